@@ -1,7 +1,6 @@
-import os.path
 from PyQt5.QtWidgets import QDialog, QFileDialog, QMessageBox
 from ui.ansys_ui import Ui_AnsysWindow
-from numpy import array
+from ansys_mesh import read_ansys_mesh
 
 class AnsysWindow(QDialog, Ui_AnsysWindow):
     def __init__(self, parent=None):
@@ -18,30 +17,7 @@ class AnsysWindow(QDialog, Ui_AnsysWindow):
     
     def checkAnsysFiles(self, nodes_path, elems_path):
         try:
-            not_found_files = [path for path in (nodes_path, elems_path) if not os.path.isfile(path)]
-            if not_found_files:
-                raise FileNotFoundError(f"Файлы не найдены: {', '.join(not_found_files)}")
-
-            with open(nodes_path) as nodes_file, open(elems_path) as elems_file:
-                next(nodes_file), next(elems_file)
-
-                self.ansys_nodes = []
-                for line in nodes_file:
-                    values = line.split()
-                    if len(values) != 4:
-                        raise ValueError("Неверный формат файла узлов!")
-                    self.ansys_nodes.append([float(v.replace(",", ".")) * 100.0 for v in values[1:3]])
-
-                self.ansys_elems = []
-                for line in elems_file:
-                    values = line.split()
-                    if len(values) != 5:
-                        raise ValueError("Неверный формат файла элементов!")
-                    self.ansys_elems.append([int(node) - 1 for node in values[2:5]])
-
-                self.ansys_nodes = array(self.ansys_nodes)
-                self.ansys_elems = array(self.ansys_elems)
-
+            self.ansys_nodes, self.ansys_elems = read_ansys_mesh(nodes_path, elems_path)
             return True
         except (FileNotFoundError, ValueError, IndexError) as e:
             QMessageBox.critical(self, "ОШИБКА", f"{str(e)}")
@@ -0,0 +1,62 @@
+import os.path
+from io import StringIO
+from hashlib import sha1
+from numpy import loadtxt, load, savez, ascontiguousarray, empty
+
+# Ключ файла экспорта: размер, время изменения, хэш содержимого и описание читаемых столбцов layout
+def get_file_key(path, data, layout=''):
+    stat = os.stat(path)
+    digest = sha1(f'{stat.st_size}:{stat.st_mtime_ns}:{layout}:'.encode())
+    digest.update(data)
+    return digest.hexdigest()
+
+# Массив из файла-спутника path.npz, если он записан для того же ключа
+def load_sidecar(path, key):
+    try:
+        with load(path + '.npz') as sidecar:
+            if str(sidecar['key']) == key: return sidecar['values']
+    except (OSError, KeyError, ValueError):
+        pass
+    return None
+
+# Запись массива в файл-спутник; кэш необязателен, ошибки записи (например, каталог только для чтения) пропускаются
+def save_sidecar(path, key, values):
+    try:
+        with open(path + '.npz.tmp', 'wb') as f:
+            savez(f, key=key, values=values)
+        os.replace(path + '.npz.tmp', path + '.npz')
+    except OSError:
+        pass
+
+# Таблица из текстового файла Ansys (первая строка - заголовок, десятичная запятая) за один проход:
+# столбцы usecols из строк ровно по columns значений. skipcols - нечисловые столбцы (например, тип
+# элемента), которые не разбираются. Результат кэшируется в файле-спутнике
+def read_table(path, columns, usecols, dtype, error, skipcols=()):
+    with open(path, 'rb') as f: data = f.read()
+    key = get_file_key(path, data, (columns, tuple(usecols), skipcols))
+    values = load_sidecar(path, key)
+    if values is not None: return values
+
+    rows = data.decode(errors='replace').partition('\n')[2].replace(',', '.')
+    try:
+        values = loadtxt(StringIO(rows), dtype=dtype, ndmin=2, comments=None,
+                         converters={column: lambda _: 0 for column in skipcols}) if rows.strip() else empty((0, columns), dtype)
+    except ValueError as e:
+        raise ValueError(error) from e
+    if values.shape[1] != columns: raise ValueError(error)
+    values = ascontiguousarray(values[:, list(usecols)])
+    save_sidecar(path, key, values)
+    return values
+
+# Чтение сетки из текстовых файлов узлов и элементов Ansys (координаты переводятся из м в см).
+# Повторная загрузка тех же файлов берёт массивы из файлов-спутников .npz рядом с ними
+def read_ansys_mesh(nodes_path, elems_path):
+    not_found_files = [path for path in (nodes_path, elems_path) if not os.path.isfile(path)]
+    if not_found_files:
+        raise FileNotFoundError(f"Файлы не найдены: {', '.join(not_found_files)}")
+
+    nodes = read_table(nodes_path, 4, (1, 2), float, "Неверный формат файла узлов!") * 100.0
+    elems = read_table(elems_path, 5, (2, 3, 4), int, "Неверный формат файла элементов!", skipcols=(1,)) - 1
+    if elems.size and (elems.min() < 0 or elems.max() >= len(nodes)):
+        raise IndexError(f"Номера узлов элементов должны быть от 1 до {len(nodes)}!")
+    return nodes, elems
@@ -0,0 +1,139 @@
+import os
+from hashlib import sha1
+from threading import Lock, get_ident
+from collections import OrderedDict
+from numpy import asarray, ascontiguousarray, savez_compressed, load, memmap
+from calculations import create_mesh, filter_nodes, triangulate, calc_stiffness_basis, combine_stiffness_basis, get_elasticity_matrix, get_mesh_key, get_nodal_averaging_matrix
+
+MESH_CACHE_DIR = 'mesh_cache' # Каталог кэша сеток
+MESH_CACHE_MAX_BYTES = 64 * 1024 * 1024 # Предельный размер кэша сеток на диске
+MESH_CACHE_VERSION = 1 # Версия построения сетки и формата файлов: увеличивается при изменении create_mesh, filter_nodes, triangulate
+OPERATORS_CACHE_MAX_BYTES = 256 * 1024 * 1024 # Предельный объём собранных систем в памяти
+
+_operators = OrderedDict()
+_operators_lock = Lock() # Кэш в памяти может использоваться из нескольких потоков
+
+# Ключ сетки: хэш версии кэша, размеров, рёбер фигуры, окружностей заклёпок и шага
+def get_geometry_key(X_SIZE, Y_SIZE, figure_edges, circles, step):
+    digest = sha1(f'mesh-v{MESH_CACHE_VERSION}'.encode())
+    digest.update(ascontiguousarray([X_SIZE, Y_SIZE, step], dtype=float).tobytes())
+    digest.update(ascontiguousarray(figure_edges, dtype=float).tobytes())
+    for center, radius in circles:
+        digest.update(ascontiguousarray([*center, radius], dtype=float).tobytes())
+    return digest.hexdigest()
+
+# Чтение сетки из кэша; при попадании обновляется время использования файла (для LRU)
+def load_mesh(key, cache_dir=MESH_CACHE_DIR):
+    path = os.path.join(cache_dir, key + '.npz')
+    try:
+        with load(path) as data:
+            nodes, elems = data['nodes'], data['elems']
+    except (OSError, KeyError, ValueError):
+        return None
+    os.utime(path)
+    return nodes, elems
+
+# Запись сетки в кэш с вытеснением давно не использованных файлов
+def save_mesh(key, nodes, elems, cache_dir=MESH_CACHE_DIR, max_bytes=MESH_CACHE_MAX_BYTES):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, key + '.npz')
+    temp_path = f'{path}.{os.getpid()}.{get_ident()}.tmp' # Свой временный файл для каждого процесса и потока
+    with open(temp_path, 'wb') as f:
+        savez_compressed(f, nodes=asarray(nodes, dtype=float), elems=asarray(elems))
+    os.replace(temp_path, path)
+    evict(cache_dir, max_bytes)
+
+# Удаление самых старых по времени использования файлов, пока кэш больше max_bytes
+def evict(cache_dir=MESH_CACHE_DIR, max_bytes=MESH_CACHE_MAX_BYTES):
+    entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith('.npz')]
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    total = sum(entry.stat().st_size for entry in entries)
+    for entry in entries[:-1]:
+        if total <= max_bytes: break
+        total -= entry.stat().st_size
+        os.remove(entry.path)
+
+# Построение сетки с использованием дискового кэша
+def get_mesh(X_SIZE, Y_SIZE, figure_edges, circles, circle_centers, step):
+    key = get_geometry_key(X_SIZE, Y_SIZE, figure_edges, circles, step)
+    cached = load_mesh(key)
+    if cached is not None:
+        return cached
+
+    nodes = filter_nodes(*create_mesh(X_SIZE, Y_SIZE, figure_edges, circles, step), circle_centers, figure_edges, circles)
+    elems = triangulate(nodes, circles)
+    try:
+        save_mesh(key, nodes, elems)
+    except OSError:
+        pass # Кэш необязателен: при ошибке записи сетка просто не сохраняется
+    return nodes, elems
+
+# Объём памяти, занимаемый массивами записи кэша; массивы, отображённые из файлов, не учитываются
+def get_nbytes(*arrays):
+    total = 0
+    for value in arrays:
+        if isinstance(value, memmap): continue
+        if hasattr(value, 'data') and hasattr(value, 'indices'): # Разреженная матрица CSR/CSC
+            total += value.data.nbytes + value.indices.nbytes + value.indptr.nbytes
+        else:
+            total += asarray(value).nbytes
+    return total
+
+# Запись из кэша в памяти (с обновлением порядка использования) или None
+def get_operator(key):
+    with _operators_lock:
+        if key not in _operators: return None
+        _operators.move_to_end(key)
+        return _operators[key][0]
+
+# Запись в кэш в памяти с вытеснением давно не использованных записей
+def put_operator(key, value, nbytes, max_bytes=OPERATORS_CACHE_MAX_BYTES):
+    with _operators_lock:
+        _operators[key] = (value, nbytes)
+        while len(_operators) > 1 and sum(size for _, size in _operators.values()) > max_bytes:
+            _operators.popitem(last=False)
+
+# Каталог хранилища для ключей кэша: матрицы B из разных хранилищ не смешиваются
+def get_store_key(store):
+    return None if store is None else os.path.abspath(store.directory)
+
+# Базис жёсткости K1, K2, K3 и матрицы B сетки из кэша в памяти; при промахе B размещаются в store, если он задан
+def get_stiffness_basis(elems, nodes, mesh_key=None, store=None):
+    key = ('basis', mesh_key or get_mesh_key(nodes, elems), get_store_key(store))
+    cached = get_operator(key)
+    if cached is not None: return cached
+
+    basis, Bs = calc_stiffness_basis(elems, nodes, store)
+    put_operator(key, (basis, Bs), get_nbytes(*basis, Bs))
+    return basis, Bs
+
+# Матрица осреднения по узлам для сетки из кэша в памяти
+def get_averaging_matrix(elems, nodes, mesh_key=None):
+    key = ('averaging', mesh_key or get_mesh_key(nodes, elems))
+    cached = get_operator(key)
+    if cached is not None: return cached
+
+    averaging_matrix = get_nodal_averaging_matrix(elems, len(nodes))
+    put_operator(key, averaging_matrix, get_nbytes(averaging_matrix))
+    return averaging_matrix
+
+# Собранная система (матрица упругости, глобальная матрица жёсткости, матрицы B) из кэша в памяти.
+# Ключ - отпечаток сетки, модуль Юнга, коэффициент Пуассона, толщина и хранилище B. Глобальная матрица
+# складывается из базиса сетки, поэтому смена материала не требует обхода элементов
+def get_assembled_system(elems, nodes, _E, mu, t, mesh_key=None, store=None):
+    mesh_key = mesh_key or get_mesh_key(nodes, elems)
+    key = (mesh_key, _E, mu, t, get_store_key(store))
+    cached = get_operator(key)
+    if cached is not None: return cached
+
+    basis, Bs = get_stiffness_basis(elems, nodes, mesh_key, store)
+    E = get_elasticity_matrix(_E, mu)
+    global_matrix = combine_stiffness_basis(basis, _E, mu, t)
+    put_operator(key, (E, global_matrix, Bs), get_nbytes(E, global_matrix))
+    return E, global_matrix, Bs
+
+# Собранные системы для всех материалов из materials.json
+def get_material_systems(elems, nodes, materials, t, mesh_key=None):
+    mesh_key = mesh_key or get_mesh_key(nodes, elems)
+    return {material_id: get_assembled_system(elems, nodes, material["young"], material["poisson"], t, mesh_key)
+            for material_id, material in materials.items()}
@@ -1,6 +1,22 @@
-from numpy import sqrt,array,arange,unique,concatenate,zeros,linalg,column_stack,ones,abs,cos,sin
-from scipy.spatial import Delaunay
-from scipy.sparse.linalg import cg
+from hashlib import sha1
+from collections import OrderedDict
+from threading import Lock
+from numpy import sqrt,inf,array,arange,unique,concatenate,zeros,linalg,column_stack,abs,cos,sin,asarray,stack,repeat,tile,ascontiguousarray,errstate,broadcast_to,meshgrid,einsum,ones,matmul,int32,int64
+from scipy.spatial import Delaunay,cKDTree
+from scipy.sparse import coo_matrix,csc_matrix,diags,issparse
+from scipy.sparse.linalg import cg,splu,spilu,LinearOperator
+from store import allocate
+
+try:
+    from sksparse.cholmod import cholesky
+except ImportError:
+    cholesky = None
+
+FACTORIZATIONS_CACHE_SIZE = 4
+CHUNK_ELEMENTS = 65536 # Число элементов в блоке пакетных вычислений: ограничивает размер временных массивов
+STALL_WINDOW = 50 # Число итераций, за которые невязка должна заметно уменьшиться
+_factorizations = OrderedDict()
+_factorizations_lock = Lock()
 
 # Получение массива рёбер фигуры
 def get_figure_edges(nodes):
@@ -20,180 +36,137 @@ def get_circles(circle_centers, radius):
         circles.append((center, radius))
     return circles
 
-# Нахождение пересечений сетки с рёбрами
-def line_intersection(line1, line2):
-    x1, y1, x2, y2 = line1[0][0], line1[0][1], line1[1][0], line1[1][1]
-    x3, y3, x4, y4 = line2[0][0], line2[0][1], line2[1][0], line2[1][1]
-
-    den = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
-    if den == 0:
-        return None
-
-    t = ((x1 - x3) * (y3 - y4) - (y1 - y3) * (x3 - x4)) / den
-    u = -((x1 - x2) * (y1 - y3) - (y1 - y2) * (x1 - x3)) / den
-
-    if 0 <= t <= 1 and 0 <= u <= 1:
-        x = x1 + t * (x2 - x1)
-        y = y1 + t * (y2 - y1)
-        return array([x, y])
-    else:
-        return None
-
-# Нахождение пересечений сетки с кругами
-def line_circle_intersection(line, circle_center, circle_radius):
-    x1, y1, x2, y2 = line[0][0], line[0][1], line[1][0], line[1][1]
-    x3, y3 = circle_center
-
-    dx = x2 - x1
-    dy = y2 - y1
-    a = dx ** 2 + dy ** 2
-    b = 2 * (dx * (x1 - x3) + dy * (y1 - y3))
-    c = (x1 - x3) ** 2 + (y1 - y3) ** 2 - circle_radius ** 2
-
-    discriminant = b ** 2 - 4 * a * c
-    if discriminant < 0:
-        return None
-
-    discriminant = sqrt(discriminant)
-    t1 = (-b + discriminant) / (2 * a)
-    t2 = (-b - discriminant) / (2 * a)
-
-    if 0 <= t1 <= 1:
-        x = x1 + t1 * dx
-        y = y1 + t1 * dy
-        return array([x, y])
-    elif 0 <= t2 <= 1:
-        x = x1 + t2 * dx
-        y = y1 + t2 * dy
-        return array([x, y])
-    else:
-        return None
+# Пересечения рёбер фигуры с прямыми сетки в замкнутом виде: для каждой прямой x = const (axis=0)
+# или y = const (axis=1) находится параметр t на каждом ребре
+def grid_edges_intersections(x, y, figure_edges):
+    edges = asarray(figure_edges, dtype=float)
+    p1, p2 = edges[:, 0], edges[:, 1]
+    points = []
+    for lines, other_lines, axis in ((y, x, 1), (x, y, 0)):
+        other = 1 - axis
+        with errstate(divide='ignore', invalid='ignore'):
+            t = (lines[None, :] - p1[:, axis, None]) / (p2[:, axis, None] - p1[:, axis, None])
+        coords = p1[:, other, None] + t * (p2[:, other, None] - p1[:, other, None])
+        mask = (t >= 0) & (t <= 1) & (coords >= other_lines[0]) & (coords <= other_lines[-1])
+        edge_points = zeros((mask.sum(), 2))
+        edge_points[:, axis] = broadcast_to(lines, t.shape)[mask]
+        edge_points[:, other] = coords[mask]
+        points.append(edge_points)
+    return concatenate(points)
+
+# Пересечения окружностей с прямыми сетки в замкнутом виде: обе точки пересечения каждой прямой
+def grid_circles_intersections(x, y, circles):
+    centers = array([center for center, _ in circles], dtype=float)
+    radii = array([radius for _, radius in circles], dtype=float)
+    points = []
+    for lines, axis in ((y, 1), (x, 0)):
+        other = 1 - axis
+        d2 = radii[:, None] ** 2 - (lines[None, :] - centers[:, axis, None]) ** 2
+        mask = d2 >= 0
+        half_chord = sqrt(d2[mask])
+        for sign in (1, -1):
+            circle_points = zeros((mask.sum(), 2))
+            circle_points[:, axis] = broadcast_to(lines, d2.shape)[mask]
+            circle_points[:, other] = broadcast_to(centers[:, other, None], d2.shape)[mask] + sign * half_chord
+            points.append(circle_points)
+    return concatenate(points)
 
 # Создание сетки    
 def create_mesh(X_SIZE, Y_SIZE, figure_edges, circles, SPLIT):
    
     x = arange(0, X_SIZE + SPLIT, SPLIT)
     y = arange(0, Y_SIZE + SPLIT, SPLIT)
-    mesh = array([[i, j] for j in y for i in x])
-
-    intersection_nodes = []
-    for edge in figure_edges:
-        for i in range(len(x) - 1):
-            for j in range(len(y) - 1):
-                line1 = edge
-                line2 = [array([x[i], y[j]]), array([x[i + 1], y[j]])]
-                intersection = line_intersection(line1, line2)
-                if intersection is not None:
-                    intersection_nodes.append(intersection)
-
-                line2 = [array([x[i], y[j]]), array([x[i], y[j + 1]])]
-                intersection = line_intersection(line1, line2)
-                if intersection is not None:
-                    intersection_nodes.append(intersection)
+    grid_x, grid_y = meshgrid(x, y)
+    mesh = column_stack((grid_x.ravel(), grid_y.ravel()))
 
-    for circle in circles:
-        center, radius = circle
-        for i in range(len(x) - 1):
-            for j in range(len(y) - 1):
-                line1 = [array([x[i], y[j]]), array([x[i + 1], y[j]])]
-                intersection1 = line_circle_intersection(line1, center, radius)
-                if intersection1 is not None:
-                    intersection_nodes.append(intersection1)
-
-                line2 = [array([x[i], y[j]]), array([x[i], y[j + 1]])]
-                intersection2 = line_circle_intersection(line2, center, radius)
-                if intersection2 is not None:
-                    intersection_nodes.append(intersection2)
+    intersection_nodes = concatenate((grid_edges_intersections(x, y, figure_edges), grid_circles_intersections(x, y, circles)))
 
     intersection_nodes = unique(intersection_nodes, axis=0)
     return array(intersection_nodes), mesh
 
-# Алгоритм проверки принадлежности точки многоугольнику
-def point_in_polygon(point, polygon_edges):
-    x, y = point
-    is_inside = False
-    for i in range(len(polygon_edges)):
-        edge = polygon_edges[i]
+# Пакетная проверка принадлежности точек (n, 2) многоугольнику
+def points_in_polygon(points, polygon_edges):
+    points = asarray(points, dtype=float)
+    x, y = points[:, 0], points[:, 1]
+    is_inside = zeros(len(points), dtype=bool)
+    for edge in polygon_edges:
         x1, y1 = edge[0]
         x2, y2 = edge[1]
-        if ((y1 < y <= y2) or (y2 < y <= y1)) and (x < (x2 - x1) * (y - y1) / (y2 - y1) + x1):
-            is_inside = not is_inside
+        with errstate(divide='ignore', invalid='ignore'):
+            crossing = (((y1 < y) & (y <= y2)) | ((y2 < y) & (y <= y1))) & (x < (x2 - x1) * (y - y1) / (y2 - y1) + x1)
+        is_inside ^= crossing
     return is_inside
 
+# Классификация узлов: маски "внутри внешнего контура" и "внутри отверстия под заклёпку"
+def classify_nodes(nodes, figure_edges, circles):
+    nodes = asarray(nodes, dtype=float)
+    inside_contour = points_in_polygon(nodes, figure_edges)
+    inside_hole = zeros(len(nodes), dtype=bool)
+    for center, radius in circles:
+        inside_hole |= (nodes[:, 0] - center[0])**2 + (nodes[:, 1] - center[1])**2 <= radius**2
+    return inside_contour, inside_hole
+
 # Фильтрация узлов
 def filter_nodes(intersection_nodes, mesh, circle_centers, figure_edges, circles):
-    edge_points = []
-    for edge in figure_edges:
-        edge_points.extend(list(edge))
-    edge_points = unique(edge_points, axis=0)
-
-    all_nodes = concatenate((intersection_nodes, edge_points))
-    all_nodes = unique(all_nodes, axis=0)
+    edge_points = unique(array([point for edge in figure_edges for point in edge], dtype=float), axis=0)
 
-    inside_mesh_nodes = []
-    for node in mesh:
-        if point_in_polygon(node, figure_edges):
-            is_inside_circle = False
-            for circle in circles:
-                center, radius = circle
-                if sqrt((node[0] - center[0])**2 + (node[1] - center[1])**2) <= radius:
-                    is_inside_circle = True
-                    break
-            if not is_inside_circle:
-                inside_mesh_nodes.append(node)
-
-    circle_boundary_nodes = []
-    for circle in circles:
-        center, radius = circle
-        for node in all_nodes:
-            if abs(sqrt((node[0] - center[0])**2 + (node[1] - center[1])**2) - radius) < 1e-5:
-                circle_boundary_nodes.append(node)
-
-    all_nodes = concatenate((all_nodes, inside_mesh_nodes, circle_boundary_nodes))
+    # Узлы на окружностях уже содержатся среди пересечений, поэтому отдельно не добавляются
+    inside_contour, inside_hole = classify_nodes(mesh, figure_edges, circles)
+    all_nodes = concatenate((intersection_nodes, edge_points, mesh[inside_contour & ~inside_hole]))
     all_nodes = unique(all_nodes, axis=0)
 
     # Исключение центров кругов из списка узлов
-    all_nodes = array([node for node in all_nodes if not any((node == center).all() for center in circle_centers)])
-
-    return all_nodes
-
-def triangulate(nodes, circles):
-    triangles = Delaunay(array(nodes)).simplices
+    is_center = (all_nodes[:, None, :] == asarray(circle_centers, dtype=float)[None, :, :]).all(axis=2).any(axis=1)
+    return all_nodes[~is_center]
+
+# Пространственный индекс узлов сетки (KD-дерево) для выборок по кругу, окружности и прямоугольнику
+class NodeIndex:
+    def __init__(self, nodes):
+        self.nodes = asarray(nodes, dtype=float)
+        self.tree = cKDTree(self.nodes)
+
+    # Узлы на расстоянии не больше radius от точки (p=inf - квадрат со стороной 2·radius)
+    def within_radius(self, point, radius, p=2):
+        return array(self.tree.query_ball_point(point, radius, p=p, return_sorted=True), dtype=int)
+
+    # Узлы на окружности с точностью tol
+    def on_circle(self, center, radius, tol=1e-5):
+        candidates = self.within_radius(center, radius + tol)
+        distances = sqrt(((self.nodes[candidates] - center)**2).sum(axis=1))
+        return candidates[abs(distances - radius) < tol]
+
+    # Узлы в прямоугольнике [x_min, x_max] x [y_min, y_max]
+    def in_rectangle(self, x_min, y_min, x_max, y_max):
+        center = [(x_min + x_max) / 2, (y_min + y_max) / 2]
+        candidates = self.within_radius(center, max(x_max - x_min, y_max - y_min) / 2, p=inf)
+        x, y = self.nodes[candidates, 0], self.nodes[candidates, 1]
+        return candidates[(x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)]
+
+def triangulate(nodes, circles, index=None):
+    triangles = Delaunay(asarray(nodes, dtype=float)).simplices
+    index = index or NodeIndex(nodes)
 
     # Проверка и исключение треугольников, все точки которых находятся на границе одного круга
-    valid_triangles = []
-    for triangle in triangles:
-        points = nodes[triangle]
-        is_same_circle_boundary = False
-        for circle in circles:
-            center, radius = circle
-            distances = [sqrt((point[0] - center[0])**2 + (point[1] - center[1])**2) for point in points]
-            if all(abs(distance - radius) < 1e-5 for distance in distances):
-                is_same_circle_boundary = True
-                break
-        if not is_same_circle_boundary:
-            valid_triangles.append(triangle)
-
-    return array(valid_triangles)
+    is_same_circle_boundary = zeros(len(triangles), dtype=bool)
+    for center, radius in circles:
+        on_boundary = zeros(len(nodes), dtype=bool)
+        on_boundary[index.on_circle(center, radius)] = True
+        is_same_circle_boundary |= on_boundary[triangles].all(axis=1)
+
+    return triangles[~is_same_circle_boundary]
 
 # Определение точек в заклёпках
-def getRivets(circles, nodes):
+def getRivets(circles, nodes, index=None):
     epsilon = 1e-3
-    circles_indices = []
-
-    for circle in circles:
-        center, radius = circle
-        for i, node in enumerate(nodes):
-            x, y = node
-            if sqrt((x - center[0])**2 + (y - center[1])**2) <= radius + epsilon:
-                circles_indices.append(i)
-
-    return array(circles_indices)
+    index = index or NodeIndex(nodes)
+    circles_indices = [index.within_radius(center, radius + epsilon) for center, radius in circles]
+    return concatenate(circles_indices) if circles_indices else array([], dtype=int)
 
 # Определение точек силы
-def getForceNodes(point, nodes, side_length):
+def getForceNodes(point, nodes, side_length, index=None):
     x, y = point
     half_side_length = side_length / 2
+    index = index or NodeIndex(nodes)
 
     points = array([[x + half_side_length, y + half_side_length],
                        [x - half_side_length, y + half_side_length],
@@ -201,108 +174,288 @@ def getForceNodes(point, nodes, side_length):
                        [x + half_side_length, y - half_side_length]])
 
     edges = get_figure_edges(points)
-
-    area_points_indices = []
-
-    for i, node in enumerate(nodes):
-        if point_in_polygon(node, edges):
-            area_points_indices.append(i)
-
-    return array(area_points_indices).astype(int)
-
-#Расчёт локальных матриц жёсткости для всех элементов
-def calc_local_stiffness_matrices(elems, nodes, E, t):
-    Bs = []
-    local_stiffness_matrices = []
-    num_nodes = len(elems[0])
-    for elem in elems:
-        k = zeros((2*num_nodes, 2*num_nodes))
-        nodes_elem = nodes[list(elem)]
-        x, y = nodes_elem[:, 0], nodes_elem[:, 1]
-
-        A = 0.5 * abs(linalg.det(column_stack((ones(num_nodes), x, y))))
-
-        B = zeros((3, 2 * num_nodes))
-        for i in range(num_nodes):
-            i_plus_1 = (i + 1) % num_nodes
-            i_plus_2 = (i + 2) % num_nodes
-
-            B[0, 2 * i] = y[i_plus_1] - y[i_plus_2]
-            B[0, 2 * i + 1] = 0
-            B[1, 2 * i] = 0
-            B[1, 2 * i + 1] = x[i_plus_2] - x[i_plus_1]
-            B[2, 2 * i] = x[i_plus_2] - x[i_plus_1]
-            B[2, 2 * i + 1] = y[i_plus_1] - y[i_plus_2]
-
-        Bs.append(B)
-
-        k = t * A * B.T @ E @ B
-        local_stiffness_matrices.append(k)
-
-    return local_stiffness_matrices, Bs
-
-#Нахождение глобальной матрицы жёсткости
-def calc_global_matrix(elems, nodes, E, t):
-
-    local_stiffness_matrices, Bs = calc_local_stiffness_matrices(elems, nodes, E, t)
-    num_nodes = len(nodes)
-    Global = zeros((num_nodes*2,num_nodes*2))
-
-    for index, elem in enumerate(elems):
-
-        loc = local_stiffness_matrices[index]
-
-        for i in range(3):
-            for j in range(3):
-                igl = elem[i]
-                jgl = elem[j]
-                Global[igl*2][jgl*2]     += loc[i*2][j*2] 
-                Global[igl*2+1][jgl*2]   += loc[i*2+1][j*2] 
-                Global[igl*2][jgl*2+1]   += loc[i*2][j*2+1] 
-                Global[igl*2+1][jgl*2+1] += loc[i*2+1][j*2+1]
-
-    return Global, Bs
-
-#Рассчёт смещений
-def calc_displacements(global_matrix, F, nodes):
-    
-    transformed_forces = array([[f[0] * cos(f[1]), f[0] * sin(f[1])] for f in F]).flatten()
-    x, info = cg(global_matrix, transformed_forces)
-    if info != 0: raise ValueError("Метод сопряженных градиентов не сошелся")
+    candidates = index.in_rectangle(x - half_side_length, y - half_side_length, x + half_side_length, y + half_side_length)
+    inside_area, _ = classify_nodes(index.nodes[candidates], edges, [])
+
+    return candidates[inside_area]
+
+# Матрица упругости для плоского напряжённого состояния
+def get_elasticity_matrix(_E, mu):
+    return (_E / (1 - mu**2)) * array([[1, mu, 0], [mu, 1, 0], [0, 0, (1 - mu) / 2]])
+
+# Площади и матрицы B для всех элементов, пакетно: (ne,) и (ne, 3, 6). Матрицы B записываются в out, если он задан
+def calc_elements_B(elems, nodes, out=None):
+    elems = asarray(elems, dtype=int)
+    x, y = nodes[elems, 0], nodes[elems, 1]
+
+    A = 0.5 * abs((x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0]))
+
+    i_plus_1, i_plus_2 = [1, 2, 0], [2, 0, 1]
+    dy = y[:, i_plus_1] - y[:, i_plus_2]
+    dx = x[:, i_plus_2] - x[:, i_plus_1]
+
+    B = zeros((len(elems), 3, 6)) if out is None else out
+    B[:, 0, 1::2] = B[:, 1, 0::2] = 0
+    B[:, 0, 0::2] = dy
+    B[:, 1, 1::2] = dx
+    B[:, 2, 0::2] = dx
+    B[:, 2, 1::2] = dy
+
+    return A, B
+
+# Базис матрицы упругости: D = E/(1-mu²)·(D1 + mu·D2 + (1-mu)/2·D3)
+ELASTICITY_BASIS = (array([[1, 0, 0], [0, 1, 0], [0, 0, 0]]),
+                    array([[0, 1, 0], [1, 0, 0], [0, 0, 0]]),
+                    array([[0, 0, 0], [0, 0, 0], [0, 0, 1]]))
+
+# Блоки по size (по умолчанию CHUNK_ELEMENTS) элементов
+def element_chunks(num_elems, size=CHUNK_ELEMENTS):
+    return [slice(start, start + size) for start in range(0, num_elems, size)]
+
+# Базисные глобальные матрицы K1, K2, K3, зависящие только от сетки, и матрицы B. Элементы обрабатываются
+# блоками, тройки COO заполняются на месте и общие для трёх матриц; при заданном store (ArrayStore)
+# матрицы B и тройки размещаются в его файлах, в памяти остаются только разреженные матрицы
+def calc_stiffness_basis(elems, nodes, store=None):
+    elems = asarray(elems, dtype=int)
+    num_elems, size = len(elems), len(nodes) * 2
+    index_dtype = int32 if size < 2**31 else int64
+    A, Bs = allocate(store, 'areas', (num_elems,)), allocate(store, 'Bs', (num_elems, 3, 6))
+    rows, cols = allocate(store, 'rows', (num_elems, 36), index_dtype), allocate(store, 'cols', (num_elems, 36), index_dtype)
+    for chunk in element_chunks(num_elems):
+        A[chunk] = calc_elements_B(elems[chunk], nodes, out=Bs[chunk])[0]
+        dofs = get_elem_dofs(elems[chunk])
+        rows[chunk], cols[chunk] = repeat(dofs, 6, axis=1), tile(dofs, (1, 6))
+
+    basis, values = [], allocate(store, 'values', (num_elems, 36))
+    for D in ELASTICITY_BASIS:
+        for chunk in element_chunks(num_elems):
+            B = Bs[chunk]
+            values[chunk] = (A[chunk, None, None] * (B.transpose(0, 2, 1) @ (D @ B))).reshape(len(B), -1)
+        basis.append(coo_matrix((values.ravel(), (rows.ravel(), cols.ravel())), shape=(size, size)).tocsr()) # tocsr копирует тройки
+    del A, values, rows, cols # Отображения закрываются до удаления файлов
+    if store is not None:
+        for name in ('areas', 'rows', 'cols', 'values'): store.remove(name)
+    return basis, Bs
+
+# Глобальная матрица жёсткости материала как линейная комбинация базиса: K = E/(1-mu²)·t·(K1 + mu·K2 + (1-mu)/2·K3)
+def combine_stiffness_basis(basis, _E, mu, t):
+    K1, K2, K3 = basis
+    coefficients = (1, mu, (1 - mu) / 2)
+    global_matrix = K1.copy()
+    if all((K.indptr == K1.indptr).all() and (K.indices == K1.indices).all() for K in (K2, K3)): # Общая структура - складываются только значения
+        global_matrix.data = sum(c * K.data for c, K in zip(coefficients, basis))
+    else:
+        global_matrix = K1 + mu * K2 + (1 - mu) / 2 * K3
+    global_matrix.data *= _E / (1 - mu**2) * t
+    return global_matrix
+
+# Индексы степеней свободы элементов в порядке (u0, v0, u1, v1, u2, v2)
+def get_elem_dofs(elems):
+    elems = asarray(elems, dtype=int)
+    return stack((2 * elems, 2 * elems + 1), axis=2).reshape(len(elems), -1)
+
+# Перевод сил из вида (значение, угол) в глобальный вектор (Fx0, Fy0, Fx1, Fy1, ...)
+def get_force_vector(F):
+    F = asarray(F, dtype=float)
+    return column_stack((F[:, 0] * cos(F[:, 1]), F[:, 0] * sin(F[:, 1]))).ravel()
+
+# Маска закреплённых степеней свободы для шарнирно-неподвижных опор
+def get_fixed_dofs(node_indices, num_nodes):
+    fixed = zeros(num_nodes * 2, dtype=bool)
+    node_indices = asarray(node_indices, dtype=int)
+    fixed[node_indices * 2] = True
+    fixed[node_indices * 2 + 1] = True
+    return fixed
+
+# Исключение закреплённых степеней свободы: система только для свободных узлов
+def reduce_system(global_matrix, force_vector, fixed):
+    free = (~fixed).nonzero()[0]
+    global_matrix = global_matrix.tocsr() if issparse(global_matrix) else global_matrix
+    return global_matrix[free][:, free], force_vector[free], free
+
+# Отпечаток сетки для ключей кэша
+def get_mesh_key(nodes, elems):
+    return sha1(ascontiguousarray(nodes, dtype=float).tobytes() + ascontiguousarray(elems, dtype=int).tobytes()).hexdigest()
+
+# Разложение матрицы: Холецкий (scikit-sparse), иначе LU (SuperLU). Возвращает функцию решения.
+# Матрица жёсткости симметрична и положительно определена: ведущие элементы берутся с диагонали,
+# иначе перестановки строк разрушают упорядочение MMD и заполнение резко растёт
+def factorize(matrix):
+    matrix = csc_matrix(matrix)
+    if cholesky is not None:
+        return cholesky(matrix)
+    return splu(matrix, permc_spec='MMD_AT_PLUS_A', diag_pivot_thresh=0, options=dict(SymmetricMode=True)).solve
+
+# Разложение из кэша; build_matrix вызывается только при промахе. Разложение строится вне блокировки,
+# поэтому при одновременном промахе в двух потоках оно может быть выполнено дважды
+def get_factorization(key, build_matrix):
+    if key is not None:
+        with _factorizations_lock:
+            if key in _factorizations:
+                _factorizations.move_to_end(key)
+                return _factorizations[key]
+
+    solve = factorize(build_matrix())
+    if key is not None:
+        with _factorizations_lock:
+            _factorizations[key] = solve
+            while len(_factorizations) > FACTORIZATIONS_CACHE_SIZE:
+                _factorizations.popitem(last=False)
+    return solve
+
+# Предобуславливатель для метода сопряжённых градиентов: 'jacobi', 'ilu' или None
+def get_preconditioner(matrix, kind):
+    if kind == 'jacobi':
+        return diags(1 / matrix.diagonal())
+    if kind == 'ilu':
+        ilu = spilu(csc_matrix(matrix), drop_tol=1e-5, fill_factor=10)
+        return LinearOperator(matrix.shape, ilu.solve)
+    return None
+
+class SolverStalled(Exception):
+    pass
+
+# Метод сопряжённых градиентов с предобуславливанием, тёплым стартом и историей невязок.
+# При расходимости или застое используется прямое решение fallback() (если задано). История невязок
+# требует лишнего умножения на матрицу на каждой итерации, поэтому по умолчанию ведётся только при fallback
+def solve_iterative(matrix, rhs, preconditioner=None, tol=1e-5, maxiter=None, x0=None, fallback=None, history=None):
+    rhs_norm = linalg.norm(rhs) or 1.0
+    residuals, iterations = [], 0
+    if history is None: history = fallback is not None
+
+    def callback(xk):
+        nonlocal iterations
+        iterations += 1
+        if not history: return
+        residuals.append(linalg.norm(rhs - matrix @ xk) / rhs_norm)
+        if fallback is not None and len(residuals) > STALL_WINDOW and residuals[-1] > 0.99 * residuals[-STALL_WINDOW - 1]:
+            raise SolverStalled()
+
+    solve_info = {'iterations': 0, 'residuals': residuals, 'converged': False, 'fallback': False}
+    try:
+        x, info = cg(matrix, rhs, x0=x0, rtol=tol, maxiter=maxiter, M=get_preconditioner(matrix, preconditioner), callback=callback)
+    except SolverStalled:
+        info = inf
+    solve_info['iterations'] = iterations
+
+    if info == 0:
+        solve_info['converged'] = True
+    elif fallback is not None:
+        x = fallback()(rhs)
+        solve_info['fallback'] = True
+        residuals.append(linalg.norm(rhs - matrix @ x) / rhs_norm)
+    else:
+        raise ValueError("Метод сопряженных градиентов не сошелся")
+
+    return x, solve_info
+
+# Закреплённые и свободные степени свободы и ключ кэша разложения для заданных опор
+def get_constraints(global_matrix, node_indices, cache_key=None):
+    fixed = get_fixed_dofs(node_indices, global_matrix.shape[0] // 2)
+    fixed |= global_matrix.diagonal() == 0 # Узлы, не входящие ни в один элемент, не имеют жёсткости
+    key = None if cache_key is None else (cache_key, sha1(fixed.tobytes()).hexdigest())
+    return fixed, (~fixed).nonzero()[0], key
+
+# Функция прямого решения системы с опорами для блока правых частей (ndof, k). Разложение выполняется
+# один раз при создании функции (или берётся из кэша по cache_key) и используется при каждом вызове
+def get_constrained_solver(global_matrix, node_indices, cache_key=None):
+    fixed, free, key = get_constraints(global_matrix, node_indices, cache_key)
+    solve = get_factorization(key, lambda: reduce_system(global_matrix, zeros(len(fixed)), fixed)[0])
+
+    def solve_block(force_vectors):
+        x = zeros(force_vectors.shape)
+        x[free] = solve(force_vectors[free])
+        return x
+    return solve_block
+
+# Прямое решение редуцированной системы сразу для блока правых частей (ndof, k) по кэшированному разложению
+def solve_constrained_block(global_matrix, force_vectors, node_indices, cache_key=None):
+    return get_constrained_solver(global_matrix, node_indices, cache_key)(force_vectors)
+
+# Расчёт смещений с опорами: решается редуцированная система, исходная матрица не изменяется.
+# solver='direct' использует разложение, закэшированное по cache_key (сетка, материал, толщина);
+# solver='pcg' - итерационный метод с предобуславливателем preconditioner, точностью tol и
+# ограничением maxiter, тёплым стартом из x0 и переходом к прямому методу при застое;
+# solver='cg' - тот же метод без предобуславливателя и без перехода к прямому методу
+def calc_displacements_constrained(global_matrix, F, nodes, node_indices, solver='cg', cache_key=None,
+                                   preconditioner='jacobi', tol=1e-8, maxiter=None, x0=None):
+    fixed, free, key = get_constraints(global_matrix, node_indices, cache_key)
+    force_vector = get_force_vector(F)
+
+    x = zeros(len(nodes) * 2)
+    if solver == 'direct':
+        solve = get_factorization(key, lambda: reduce_system(global_matrix, force_vector, fixed)[0])
+        x[free] = solve(force_vector[free])
+        solve_info = {'iterations': 0, 'residuals': [], 'converged': True, 'fallback': False}
+    elif solver == 'pcg':
+        reduced_matrix, reduced_forces, free = reduce_system(global_matrix, force_vector, fixed)
+        x[free], solve_info = solve_iterative(reduced_matrix, reduced_forces, preconditioner, tol, maxiter,
+            None if x0 is None else asarray(x0).ravel()[free], lambda: get_factorization(key, lambda: reduced_matrix))
+    else:
+        reduced_matrix, reduced_forces, free = reduce_system(global_matrix, force_vector, fixed)
+        x[free], solve_info = solve_iterative(reduced_matrix, reduced_forces, None, tol, maxiter,
+            None if x0 is None else asarray(x0).ravel()[free])
+    solve_info['solver'] = solver
     displacements = x.reshape(len(nodes), 2)
 
-    return nodes + displacements, displacements
-
-# Добавление шарнирно-неподвижных опор
-def add_supports(global_matrix, F, node_indices):
-    for node_index in node_indices:
-        global_matrix[node_index*2, :] = 0
-        global_matrix[:, node_index*2] = 0
-        global_matrix[node_index*2+1, :] = 0
-        global_matrix[:, node_index*2+1] = 0
-        global_matrix[node_index*2, node_index*2] = 1
-        global_matrix[node_index*2+1, node_index*2+1] = 1
-        F[node_index] = [0,0]
-            
-    return global_matrix, F
-
-# Рассчет напряжений и деформаций для каждого элемента
-def calc_stresses_and_strains(elems, E, Bs, displacements):
-    stresses = []
-    strains = []
-    equivalent_stresses = []
-    equivalent_strains = []
-
-    for i, elem in enumerate(elems):
-        epsilon = Bs[i] @ displacements[elem].flatten()
-        sigma = E @ epsilon
-
-        epsilon_eq = (sqrt(2) / 3) * sqrt(epsilon[0] ** 2 + epsilon[1] ** 2 + 1.5 * epsilon[2] ** 2)
-        sigma_eq = (1 / sqrt(2)) * sqrt(sigma[0] ** 2 + sigma[1] ** 2 + 6 * sigma[2] ** 2)
-
-        strains.append(epsilon)
-        stresses.append(sigma)
-        equivalent_strains.append(epsilon_eq)
-        equivalent_stresses.append(sigma_eq)
-
-    return array(stresses), array(strains), array(equivalent_stresses), array(equivalent_strains)
\ No newline at end of file
+    return nodes + displacements, displacements, solve_info
+
+# Единичные отклики: смещения (n, 2) от единичных сил по X и по Y в каждой точке приложения силы
+def calc_unit_responses(global_matrix, nodes, node_indices, force_nodes, cache_key=None):
+    force_vectors = zeros((len(nodes) * 2, 2))
+    force_vectors[asarray(force_nodes, dtype=int) * 2, 0] = 1
+    force_vectors[asarray(force_nodes, dtype=int) * 2 + 1, 1] = 1
+    x = solve_constrained_block(global_matrix, force_vectors, node_indices, cache_key)
+    return x[:, 0].reshape(len(nodes), 2), x[:, 1].reshape(len(nodes), 2)
+
+# Смещения от силы f_value под углом f_angle (рад) как суперпозиция единичных откликов
+def superpose_unit_responses(unit_responses, f_value, f_angle):
+    unit_x, unit_y = unit_responses
+    return f_value * (cos(f_angle) * unit_x + sin(f_angle) * unit_y)
+
+# Реакции в узлах: R = K·u - F по исходной (незакреплённой) матрице
+def calc_reactions(global_matrix, displacements, F):
+    reactions = global_matrix @ displacements.ravel() - get_force_vector(F)
+    return reactions.reshape(-1, 2)
+
+# Суммарные реакции (Rx, Ry) для каждой заклёпки
+def get_rivet_reactions(circles, nodes, reactions, index=None):
+    rivet_reactions = []
+    index = index or NodeIndex(nodes)
+    for circle in circles:
+        rivet_nodes = getRivets([circle], nodes, index)
+        rivet_reactions.append(reactions[rivet_nodes].sum(axis=0) if len(rivet_nodes) else zeros(2))
+    return array(rivet_reactions)
+
+# Рассчет напряжений и деформаций для всех элементов, блоками по CHUNK_ELEMENTS. out - массивы
+# (напряжения, деформации, эквивалентные напряжения, эквивалентные деформации) для записи результата
+def calc_stresses_and_strains(elems, E, Bs, displacements, out=None):
+    elems = asarray(elems, dtype=int)
+    num_elems = len(elems)
+    stresses, strains, equivalent_stresses, equivalent_strains = out or (zeros((num_elems, 3)), zeros((num_elems, 3)), zeros(num_elems), zeros(num_elems))
+    for chunk in element_chunks(num_elems):
+        B = Bs[chunk]
+        einsum('nij,nj->ni', B, displacements[elems[chunk]].reshape(len(B), -1), out=strains[chunk])
+        matmul(strains[chunk], E.T, out=stresses[chunk])
+        equivalent_stresses[chunk], equivalent_strains[chunk] = calc_equivalent_values(stresses[chunk].T, strains[chunk].T)
+
+    return stresses, strains, equivalent_stresses, equivalent_strains
+
+# Эквивалентные напряжения и деформации; компоненты (xx, yy, xy) - по первой оси массивов
+def calc_equivalent_values(stresses, strains):
+    equivalent_strains = (sqrt(2) / 3) * sqrt(strains[0] ** 2 + strains[1] ** 2 + 1.5 * strains[2] ** 2)
+    equivalent_stresses = (1 / sqrt(2)) * sqrt(stresses[0] ** 2 + stresses[1] ** 2 + 6 * stresses[2] ** 2)
+    return equivalent_stresses, equivalent_strains
+
+# Матрица осреднения по узлам (n_nodes, ne): строка узла - доли прилегающих к нему элементов
+def get_nodal_averaging_matrix(elems, num_nodes):
+    elems = asarray(elems, dtype=int)
+    incidence = coo_matrix((ones(elems.size), (elems.ravel(), repeat(arange(len(elems)), elems.shape[1]))),
+                           shape=(num_nodes, len(elems))).tocsr()
+    counts = asarray(incidence.sum(axis=1)).ravel()
+    counts[counts == 0] = 1
+    return (diags(1 / counts) @ incidence).tocsr()
+
+# Узловые значения полей, осреднённые по прилегающим элементам
+def recover_nodal_values(averaging_matrix, *element_values):
+    return tuple(averaging_matrix @ values for values in element_values)
@@ -0,0 +1,63 @@
+import rapidjson
+from os import makedirs, path
+from argparse import ArgumentParser
+from numpy import savetxt, column_stack, arange
+from solver import Solver
+from ansys_mesh import read_ansys_mesh
+from store import ArrayStore
+
+# Поиск материала в materials.json по идентификатору или названию
+def find_material(materials, name):
+    if name in materials: return materials[name]
+    for material in materials.values():
+        if material["name"] == name: return material
+    raise ValueError(f'Материал "{name}" не найден')
+
+# Запись смещений узлов и полей напряжений/деформаций элементов в TSV-файлы каталога output_dir
+def write_results(results, nodes, output_dir):
+    makedirs(output_dir, exist_ok=True)
+    displacements = results['displacements']
+    savetxt(path.join(output_dir, 'displacements.tsv'), column_stack((arange(1, len(nodes) + 1), nodes, displacements)),
+            fmt=['%d'] + ['%.9e'] * 4, delimiter='\t', header='node\tx\ty\tux\tuy', comments='')
+    stresses, strains = results['stresses'], results['strains']
+    savetxt(path.join(output_dir, 'stresses.tsv'),
+            column_stack((arange(1, len(stresses) + 1), stresses, strains, results['stresses_eq'], results['strains_eq'])),
+            fmt=['%d'] + ['%.9e'] * 8, delimiter='\t', comments='',
+            header='index\tsigma_x\tsigma_y\ttau_xy\teps_x\teps_y\tgamma_xy\tsigma_eq\teps_eq')
+    savetxt(path.join(output_dir, 'reactions.tsv'), column_stack((arange(1, len(results['reactions']) + 1), results['reactions'])),
+            fmt=['%d', '%.9e', '%.9e'], delimiter='\t', header='rivet\tRx\tRy', comments='')
+
+def main(argv=None):
+    parser = ArgumentParser(description='Расчёт напряжённо-деформированного состояния заклёпочного соединения без графического интерфейса')
+    parser.add_argument('--materials', default='materials.json', help='файл материалов')
+    parser.add_argument('--material', default='1', help='идентификатор или название материала')
+    parser.add_argument('--thickness', type=float, default=1.0, help='толщина')
+    parser.add_argument('--force', type=float, default=1e10, help='величина силы')
+    parser.add_argument('--angle', type=float, default=45.0, help='угол приложения силы (°)')
+    parser.add_argument('--step', type=float, default=0.5, help='шаг сетки (и размер области приложения силы)')
+    parser.add_argument('--ansys', nargs=2, metavar=('NODES', 'ELEMS'), help='файлы узлов и элементов Ansys')
+    parser.add_argument('--solver', choices=['cg', 'direct', 'pcg'], default='direct', help='метод решения')
+    parser.add_argument('--preconditioner', choices=['jacobi', 'ilu'], default='jacobi', help='предобуславливатель для pcg')
+    parser.add_argument('--nodal', action='store_true', help='осреднить напряжения и деформации по узлам')
+    parser.add_argument('--output', default='results', help='каталог результатов')
+    parser.add_argument('--spectrum', metavar='HISTORY',
+                        help='файл истории нагружения (величина, угол): пики по шагам записываются в spectrum.tsv')
+    parser.add_argument('--store', nargs='?', const='', metavar='DIR',
+                        help='хранить массивы сетки и полей в файлах, отображаемых в память (без DIR - во временном каталоге)')
+    args = parser.parse_args(argv)
+
+    with open(args.materials, 'rb') as f: material = find_material(rapidjson.load(f), args.material)
+    nodes, elems = read_ansys_mesh(*args.ansys) if args.ansys else (None, None)
+    store = None if args.store is None else ArrayStore(args.store or None)
+    solver = Solver(material["young"], material["poisson"], args.thickness, args.step, nodes, elems, store)
+    options = {'preconditioner': args.preconditioner} if args.solver == 'pcg' else {}
+    results = solver.analyse(args.force, args.angle, args.nodal, solver=args.solver, **options)
+    write_results(results, solver.nodes, args.output)
+    print(f'Узлов: {len(solver.nodes)}, элементов: {len(solver.elems)}, '
+          f'макс. эквивалентное напряжение: {results["stresses_eq"].max():.6g}, результаты: {args.output}')
+    if args.spectrum:
+        peaks = solver.load_spectrum(args.spectrum, path.join(args.output, 'spectrum.tsv'))
+        print(f'Шагов нагружения: {peaks["steps"]}, пиковое эквивалентное напряжение: {peaks["stress_eq"]:.6g}')
+
+if __name__ == '__main__':
+    main()
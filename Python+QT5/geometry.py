@@ -0,0 +1,13 @@
+from numpy import array
+from calculations import get_figure_edges, get_circles
+
+# Размеры
+a, b, c, d, e, f, g = 10.0, 8.0, 6.0, 5.5, 1.0, 1.5, 1.5
+h = b + c
+i = b - 2 * f
+j = a - 2 * g
+      
+edge_nodes = array([[0, 0],[0, a],[h, a],[h, a - d],[b, 0]]) # Длины рёбер фигуры
+circle_centers = array([[f, a - g],[b - f, a - g],[f, g],[b - f, g]]) # Центры окружностей
+figure_edges = get_figure_edges(edge_nodes) # Рёбра фигуры
+circles = get_circles(circle_centers, e) # Окружности
@@ -1,86 +1,228 @@
-from numpy import sin,cos,linalg,max
-from matplotlib.pyplot import subplots,colorbar,close
+from numpy import sin,cos,linalg,concatenate,column_stack,full,nan,ma
+from PyQt5.QtCore import QTimer
+from matplotlib.pyplot import subplots
 from matplotlib.tri import Triangulation
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from matplotlib.colors import LinearSegmentedColormap
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg, NavigationToolbar2QT
+from raster import rasterize, colors, get_edges, get_outline_edges, LOD_ELEMENTS
+
+cmap = LinearSegmentedColormap.from_list('custom_cmap', colors)
+LOD_MAX_PIXELS = 1000 # Наибольший размер растра поля по каждой оси
 
 # Класс холста Qt для помещения рисунка Matplotlib
 class MplCanvas(FigureCanvasQTAgg):
     def __init__(self, fig):
         super(MplCanvas, self).__init__(fig)
 
+# Рисунок с холстом и панелью инструментов. Создаётся один раз, при новых результатах
+# обновляются данные уже построенных объектов (artists), сохранённых в self.artists.
+# Для больших сеток в self.lod хранятся функции уточнения осей, вызываемые после масштабирования и сдвига
+class GraphPanel:
+    def __init__(self, layout, parent, rows, cols, **adjust):
+        self.fig, self.axes = initGraph(rows, cols, **adjust)
+        self.canvas = MplCanvas(self.fig)
+        layout.addWidget(self.canvas)
+        self.toolbar = NavigationToolbar2QT(self.canvas, parent)
+        self.toolbar.setStyleSheet("background-color: rgb(255,255,255);")
+        layout.addWidget(self.toolbar)
+        self.artists = {}
+        self.lod = {}
+        self.lod_timer = QTimer() # Уточнение один раз после серии изменений пределов
+        self.lod_timer.setSingleShot(True)
+        self.lod_timer.setInterval(100)
+        self.lod_timer.timeout.connect(self.refine)
+
+    # Отслеживание пределов осей для уточнения детализации (fn - функция уточнения или None)
+    def watch(self, ax, fn):
+        if fn is None:
+            self.lod.pop(ax, None)
+            return
+        if ax not in self.lod:
+            ax.callbacks.connect('xlim_changed', lambda ax: self.lod_timer.start())
+            ax.callbacks.connect('ylim_changed', lambda ax: self.lod_timer.start())
+        self.lod[ax] = fn
+
+    def refine(self):
+        if any([fn() for fn in self.lod.values()]): self.canvas.draw_idle()
+
+    def setVisible(self, visible):
+        self.canvas.setVisible(visible)
+        self.toolbar.setVisible(visible)
+
+    # Перерисовка холста; история масштабирования панели инструментов сбрасывается
+    def refresh(self):
+        self.toolbar.update()
+        self.canvas.draw_idle()
+
 # Функция для подготовки рисунка с пустыми осями и предварительного их оформления, без задания данных
 def initGraph(rows, cols, figSize=None, top=None, bottom=None, left=None, right=None, hspace=None, wspace=None):
     fig, axes = subplots(nrows=rows, ncols=cols, figsize=figSize, facecolor='white',dpi=100)
     fig.subplots_adjust(top=top, bottom=bottom, left=left, right=right, hspace=hspace, wspace=wspace)
     return fig, axes
 
-# Функция для обновления холстов
-def updateGraphs(fig1, fig2 , fig3, self):
-    if self.canvas1 and self.canvas2 and self.canvas3:       
-            self.companovka_for_mpl1.removeWidget(self.toolbar1)
-            self.companovka_for_mpl1.removeWidget(self.canvas1)
-            self.toolbar1.deleteLater()
-            self.canvas1.deleteLater()
-            self.canvas1.hide()
-            self.toolbar1.hide()
-            self.companovka_for_mpl2.removeWidget(self.toolbar2)
-            self.companovka_for_mpl2.removeWidget(self.canvas2)
-            self.toolbar2.deleteLater()
-            self.canvas2.deleteLater()
-            self.canvas2.hide()
-            self.toolbar2.hide()
-            self.companovka_for_mpl3.removeWidget(self.toolbar3)
-            self.companovka_for_mpl3.removeWidget(self.canvas3)
-            self.toolbar3.deleteLater()
-            self.canvas3.deleteLater()
-            self.canvas3.hide()
-            self.toolbar3.hide()
-            close('all')
-        
-    self.canvas1 = MplCanvas(fig1)
-    self.companovka_for_mpl1.addWidget(self.canvas1)
-    self.toolbar1 = NavigationToolbar2QT(self.canvas1, self)
-    self.toolbar1.setStyleSheet("background-color: rgb(255,255,255);")
-    self.companovka_for_mpl1.addWidget(self.toolbar1)
-    self.canvas2 = MplCanvas(fig2)
-    self.companovka_for_mpl2.addWidget(self.canvas2)
-    self.toolbar2 = NavigationToolbar2QT(self.canvas2, self)
-    self.toolbar2.setStyleSheet("background-color: rgb(255,255,255);")
-    self.companovka_for_mpl2.addWidget(self.toolbar2)
-    self.canvas3 = MplCanvas(fig3)
-    self.companovka_for_mpl3.addWidget(self.canvas3)
-    self.toolbar3 = NavigationToolbar2QT(self.canvas3, self)
-    self.toolbar3.setStyleSheet("background-color: rgb(255,255,255);")
-    self.companovka_for_mpl3.addWidget(self.toolbar3)
+# Расположение осей на вкладках: модель, напряжения и деформации, эквивалентные значения
+TAB_GRAPHS = [dict(rows=1,cols=2,top=0.94,bottom=0.094,left=0.052,right=0.988,hspace=0.2,wspace=0.142),
+              dict(rows=2,cols=3,top=0.908,bottom=0.094,left=0.033,right=0.972,hspace=0.494,wspace=0.178),
+              dict(rows=1,cols=2,top=0.908,bottom=0.094,left=0.057,right=0.965,hspace=0.2,wspace=0.212)]
+
+# Функция для создания холста вкладки при первом её показе
+def initTabGraph(self, index):
+    layout = (self.companovka_for_mpl1, self.companovka_for_mpl2, self.companovka_for_mpl3)[index]
+    return GraphPanel(layout, self, **TAB_GRAPHS[index])
+
+# Координаты рёбер для одной линии: отрезки разделены NaN (как в triplot)
+def get_edge_lines(nodes, edges):
+    lines = full((len(edges), 3, 2), nan)
+    lines[:, :2] = nodes[edges]
+    return lines.reshape(-1, 2).T
+
+# Пределы осей по новым данным (коллекции не учитываются в ax.relim)
+def fitView(ax, points):
+    ax.ignore_existing_data_limits = True
+    ax.update_datalim(points)
+    ax.autoscale_view()
+
+# Триангуляция с TriFinder, недоступным (None) при перекрывающихся после сильной деформации элементах;
+# неудачная попытка построения запоминается
+class ResultTriangulation(Triangulation):
+    trifinder_failed = False
+    def get_trifinder(self):
+        if self.trifinder_failed: return None
+        try: return super().get_trifinder()
+        except RuntimeError:
+            self.trifinder_failed = True
+            return None
+
+# Триангуляция деформированной сетки: строится один раз на результат и используется всеми графиками
+# (рёбра, заливки, поиск элемента под курсором через кэшируемый TriFinder)
+def get_triangulation(displaced_nodes, elems):
+    return ResultTriangulation(displaced_nodes[:, 0], displaced_nodes[:, 1], triangles=elems)
+
+# Видимые в пределах осей элементы (по центрам)
+def visible_elements(ax, centers):
+    (x0, x1), (y0, y1) = sorted(ax.get_xlim()), sorted(ax.get_ylim())
+    return ((centers[:, 0] >= x0) & (centers[:, 0] <= x1) & (centers[:, 1] >= y0) & (centers[:, 1] <= y1)).nonzero()[0]
+
+# Рёбра сетки на оси. Для больших сеток при мелком масштабе - только контур и заклёпки,
+# при увеличении (не более LOD_ELEMENTS видимых элементов) - все видимые рёбра
+def drawEdges(panel, ax, line, nodes, triangulation, rivets_nodes):
+    if len(triangulation.triangles) <= LOD_ELEMENTS:
+        line.set_data(*get_edge_lines(nodes, triangulation.edges))
+        panel.watch(ax, None)
+        return
+    elems = triangulation.triangles
+    outline, centers, shown = get_outline_edges(elems, rivets_nodes), nodes[elems].mean(axis=1), [None]
+    def refine():
+        visible = visible_elements(ax, centers)
+        detailed = len(visible) <= LOD_ELEMENTS
+        if not detailed and shown[0] is False: return False
+        line.set_data(*get_edge_lines(nodes, get_edges(elems[visible]) if detailed else outline))
+        shown[0] = detailed
+        return True
+    panel.watch(ax, refine)
 
 #Отображение графиков модели
-def drawModel(axes, elems, _nodes, displaced_nodes, F, force_points, rivets_nodes):
+def drawModel(panel, triangulation, _nodes, F, force_points, rivets_nodes):
     titles=['Модель до воздействия сил', 'Модель после воздействия сил']
-    max_force = max(linalg.norm(F, axis=1))
-    for i, ax in enumerate(axes):
+    max_force = linalg.norm(F, axis=1).max()
+    displaced_nodes = column_stack((triangulation.x, triangulation.y))
+    for i, ax in enumerate(panel.axes):
         nodes = _nodes if i == 0 else displaced_nodes
 
-        ax.triplot(nodes[:,0], nodes[:,1], elems, color='#1E90FF')
-        ax.scatter(nodes[rivets_nodes, 0], nodes[rivets_nodes, 1], color='#FF4500', marker='o')
-        ax.scatter(nodes[force_points, 0], nodes[force_points, 1], color='#8B0000', marker='o')
+        if ax not in panel.artists:
+            panel.artists[ax] = {'mesh': ax.plot([], [], color='#1E90FF')[0],
+                                 'rivets': ax.scatter([], [], color='#FF4500', marker='o'),
+                                 'forces': ax.scatter([], [], color='#8B0000', marker='o'), 'arrows': None}
+            ax.set_xlabel('X')
+            ax.set_ylabel('Y')
+            ax.set_title(titles[i])
+            ax.grid(True)
+            ax.axis('equal')
+        artists = panel.artists[ax]
 
-        for point in force_points:
-            magnitude, angle = F[point]
-            magnitude = magnitude / max_force
-            dx = magnitude * cos(angle)
-            dy = magnitude * sin(angle)
-            ax.arrow(nodes[point, 0], nodes[point, 1], dx, dy, color='#FF0000', width=0.03)
+        drawEdges(panel, ax, artists['mesh'], nodes, triangulation, rivets_nodes)
+        artists['rivets'].set_offsets(nodes[rivets_nodes])
+        artists['forces'].set_offsets(nodes[force_points])
 
+        # Стрелки сил - одна коллекция quiver в координатах данных
+        magnitude, angle = F[force_points, 0] / max_force, F[force_points, 1]
+        arrows = column_stack((magnitude * cos(angle), magnitude * sin(angle)))
+        if artists['arrows'] is None or artists['arrows'].N != len(force_points):
+            if artists['arrows'] is not None: artists['arrows'].remove()
+            artists['arrows'] = ax.quiver(nodes[force_points, 0], nodes[force_points, 1], arrows[:, 0], arrows[:, 1], color='#FF0000',
+                                          angles='xy', scale_units='xy', scale=1, units='xy', width=0.03)
+        else:
+            artists['arrows'].set_offsets(nodes[force_points])
+            artists['arrows'].set_UVC(arrows[:, 0], arrows[:, 1])
+        fitView(ax, concatenate((nodes, nodes[force_points] + arrows)))
+    if panel.lod: panel.refine() # Детализация по пределам после подгонки осей
+
+# Растр поля в пределах осей с разрешением по размеру осей на экране; вне сетки - прозрачно
+def rasterField(ax, triangulation, values):
+    (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+    bbox = ax.get_window_extent()
+    width, height = (int(min(max(size, 1), LOD_MAX_PIXELS)) for size in (bbox.width, bbox.height))
+    nodes = column_stack((triangulation.x, triangulation.y))
+    return ma.masked_invalid(rasterize(nodes, triangulation.triangles, values, (x0, x1, y0, y1), width, height)), (x0, x1, y0, y1)
+
+# Заливка значений по элементам (или узлам - плавная заливка) с цветовой шкалой. Для заливки по элементам
+# обновляются многоугольники и значения существующей коллекции; она пересоздаётся только при смене способа заливки.
+# Большие сетки выводятся растром, который пересчитывается по пределам осей при масштабировании
+def plotField(panel, ax, triangulation, values, name):
+    elems, displaced_nodes = triangulation.triangles, column_stack((triangulation.x, triangulation.y))
+    shading = 'gouraud' if len(values) == len(displaced_nodes) else 'flat' # Узловые значения - плавная заливка
+    if len(elems) > LOD_ELEMENTS: shading = 'raster'
+    artists = panel.artists.get(ax)
+    if artists is None:
         ax.set_xlabel('X')
         ax.set_ylabel('Y')
-        ax.set_title(titles[i])
-        ax.grid(True)
+        ax.set_title(name, pad=20)
         ax.axis('equal')
+        artists = panel.artists[ax] = {'cax': make_axes_locatable(ax).append_axes("right", size="7%", pad=0.2), 'mappable': None}
+        ax.format_coord = lambda x, y: formatValue(artists, x, y)
+
+    mappable = artists['mappable']
+    if mappable is not None and shading == artists['shading'] and shading != 'gouraud':
+        if shading == 'flat': # Растр пересчитывается ниже
+            mappable.set_verts(displaced_nodes[elems])
+            mappable.set_array(values)
+        mappable.set_clim(values.min(), values.max()) # Цветовая шкала обновляется по событию изменения пределов
+    else:
+        if mappable is not None:
+            mappable.remove()
+            artists['cax'].clear()
+        if shading == 'raster': artists['mappable'] = ax.imshow([[0]], cmap=cmap, origin='lower', interpolation='nearest', aspect='auto')
+        else: artists['mappable'] = ax.tripcolor(triangulation, values, cmap=cmap, shading=shading)
+        artists['mappable'].set_clim(values.min(), values.max())
+        panel.fig.colorbar(artists['mappable'], cax=artists['cax'])
+    artists['shading'], artists['elems'], artists['triangulation'], artists['values'] = shading, elems, triangulation, values
+    fitView(ax, displaced_nodes)
+
+    if shading == 'raster':
+        image, limits = artists['mappable'], [None]
+        def refine():
+            if limits[0] == (ax.get_xlim(), ax.get_ylim()): return False
+            data, extent = rasterField(ax, triangulation, values)
+            image.set_data(data)
+            image.set_extent(extent)
+            limits[0] = (ax.get_xlim(), ax.get_ylim())
+            return True
+        panel.watch(ax, refine)
+        refine()
+    else: panel.watch(ax, None)
+
+# Подпись панели инструментов: координаты и значение в элементе под курсором (для узловых значений - среднее по узлам элемента)
+def formatValue(artists, x, y):
+    trifinder = artists['triangulation'].get_trifinder()
+    elem = int(trifinder(x, y)) if trifinder is not None else -1
+    if elem < 0: return f'x={x:.3g}, y={y:.3g}'
+    values = artists['values']
+    value = values[elem] if len(values) == len(artists['elems']) else values[artists['elems'][elem]].mean()
+    return f'x={x:.3g}, y={y:.3g}, элемент {elem}: {value:.4g}'
 
 #Оттображение графиков напряжений и деформаций
-def drawStrainsStresses(axes, axes_eq, elems, displaced_nodes, stresses, strains, stresses_eq, strains_eq):
+def drawStrainsStresses(panel, triangulation, stresses, strains):
     data = {
         "Продольная деформация вдоль оси X": strains[:, 0],
         "Продольная деформация вдоль оси Y": strains[:, 1],
@@ -89,33 +231,18 @@ def drawStrainsStresses(axes, axes_eq, elems, displaced_nodes, stresses, strains
         "Нормальное напряжение по оси Y": stresses[:, 1],
         "Сдвиговое напряжение": stresses[:, 2]
     }
-    data_eq = {
-        "Эквивалентная деформация": strains_eq,
-        "Эквивалентное напряжение": stresses_eq
-    }
-
-    colors = ['#0000FF', '#00FFFF', '#00FF00', '#FFFF00', '#FF0000']
-    cmap = LinearSegmentedColormap.from_list('custom_cmap', colors)
-
-    def plot(ax, component_values, component_name):
-        triangles = Triangulation(displaced_nodes[:, 0], displaced_nodes[:, 1], triangles=elems)
-        mappable = ax.tripcolor(triangles, component_values, cmap=cmap)
-
-        ax.set_xlabel('X')
-        ax.set_ylabel('Y')
-        ax.set_title(component_name, pad=20)
-        ax.axis('equal')
-
-        divider = make_axes_locatable(ax)
-        cax = divider.append_axes("right", size="7%", pad=0.2)
-        colorbar(mappable, cax=cax)
 
     for i, (component_name, component_values) in enumerate(data.items()):
         row = i // 3
         col = i % 3
-        ax = axes[row, col]
-        plot(ax, component_values, component_name)
+        plotField(panel, panel.axes[row, col], triangulation, component_values, component_name)
+
+#Отображение графиков эквивалентных напряжений и деформаций
+def drawEquivalent(panel_eq, triangulation, stresses_eq, strains_eq):
+    data_eq = {
+        "Эквивалентная деформация": strains_eq,
+        "Эквивалентное напряжение": stresses_eq
+    }
 
     for i, (component_name, component_values) in enumerate(data_eq.items()):
-        ax_eq = axes_eq[i]
-        plot(ax_eq, component_values, component_name)
\ No newline at end of file
+        plotField(panel_eq, panel_eq.axes[i], triangulation, component_values, component_name)
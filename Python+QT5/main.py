@@ -1,24 +1,14 @@
+from time import perf_counter
+START_TIME = perf_counter() # Для измерения времени запуска (--startup-time)
+import threading # noqa: F401 - загружается в главном потоке: поток, впервые импортировавший threading, считается главным (в т.ч. matplotlib)
 import rapidjson
 from sys import argv, exit
-from math import radians
-from numpy import array
-from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox, QProgressBar, QPushButton
 from ui.main_ui import Ui_MainWindow
 from materials import MaterialsWindow
 from ansys import AnsysWindow
-from calculations import *
-from graphics import *
-
-# Размеры
-a, b, c, d, e, f, g = 10.0, 8.0, 6.0, 5.5, 1.0, 1.5, 1.5
-h = b + c
-i = b - 2 * f
-j = a - 2 * g
-      
-edge_nodes = array([[0, 0],[0, a],[h, a],[h, a - d],[b, 0]]) # Длины рёбер фигуры
-circle_centers = array([[f, a - g],[b - f, a - g],[f, g],[b - f, g]]) # Центры окружностей
-figure_edges = get_figure_edges(edge_nodes) # Рёбра фигуры
-circles = get_circles(circle_centers, e) # Окружности
+from worker import AnalysisWorker
 
 # Класс основного окна приложения
 class MainWindow(QMainWindow, Ui_MainWindow):
@@ -27,16 +17,27 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.setupUi(self)
         with open('materials.json', 'rb') as f: self.MATERIALS = rapidjson.load(f)
         self.STEPS = [0.25,0.5,1]
+        self.SOLVERS = [{'solver': 'cg'}, {'solver': 'direct'},
+                        {'solver': 'pcg', 'preconditioner': 'jacobi'}, {'solver': 'pcg', 'preconditioner': 'ilu'}]
+        self.last_solution = None # (отпечаток сетки, смещения) для тёплого старта итерационного метода
+        self.solver = None # Расчётная модель последнего запуска (для пересчёта нагрузки ползунками)
+        self.worker = None # Поток текущего расчёта
+        self.pending_job = None # Параметры расчёта, ожидающего отмены текущего
+        self.report_startup = False # Вывод времени до первых результатов
         self.ansys_nodes = None
         self.ansys_elems = None
         self.ansysDataLoaded = False
         self.widgets_adjust()
         self.setupUiValues()
-        self.execute()
+        QTimer.singleShot(0, self.execute) # Первый расчёт - в фоне после показа окна
 
     # Настройка виджетов и инициализация значений полей ввода
     def widgets_adjust(self):
-        self.canvas1 = self.canvas2 = self.canvas3 = None
+        self.graphs = {} # Холсты вкладок по (вывод Qt, номер вкладки); создаются при первом показе вкладки
+        self.results = None
+        self.stale_tabs = set() # Вкладки, не перерисованные после получения результатов
+        self.tabWidget.currentChanged.connect(self.drawTab)
+        self.nativeCheck.toggled.connect(self.redrawTabs)
         self.materialsButton.clicked.connect(self.openMaterialWindow)
         self.execButton.clicked.connect(self.execute)
         self.ansysButton.clicked.connect(self.openAnsysWindow)
@@ -44,15 +45,32 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.updateDropDownList()
         self.meshStepSelect.valueChanged.connect(self.stepSelected)
         self.ansysCheck.clicked.connect(self.useAnsys)
+        self.solverSelect.currentIndexChanged.connect(self.solverSelected)
+        self.angleSlider.valueChanged.connect(self.scrubLoad)
+        self.forceSlider.valueChanged.connect(self.scrubLoad)
+        self.progressBar = QProgressBar(self)
+        self.progressBar.setMaximumWidth(200)
+        self.progressBar.hide()
+        self.statusBar().addPermanentWidget(self.progressBar)
+        self.cancelButton = QPushButton('Отмена', self)
+        self.cancelButton.clicked.connect(self.cancelJob)
+        self.cancelButton.hide()
+        self.statusBar().addPermanentWidget(self.cancelButton)
 
     def setupUiValues(self):
         self.ANSYS = False
+        self.SOLVER = self.SOLVERS[self.solverSelect.currentIndex()]
         self.thicknessInput.setText('1')
         self.forceInput.setText('1e10')
         self.angleInput.setText('45')
+        self.tolInput.setText('1e-8')
+        self.maxiterInput.setText('1000')
         self.meshStepSelect.setRange(0, len(self.STEPS) - 1)
         self.meshStepSelect.setSingleStep(1)
         self.meshStepSelect.setSliderPosition(round((len(self.STEPS) - 1) / 2))
+        self.angleSlider.setRange(0, 360)
+        self.forceSlider.setRange(0, 200)
+        self.syncLoadSliders(45)
     
     # Методы для работы c модальными окнами
     def openAnsysWindow(self): AnsysWindow(self).exec_()
@@ -73,17 +91,21 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             self.mu = material["poisson"] # коэффициент Пуассона
             self._E = material["young"] # модуль Юнга
     
-    # Метод для получения заклёпок и точек приложения сил
-    def get_rivets_and_force_nodes(self,circles,nodes,x,y,size):
-        return getRivets(circles,nodes),getForceNodes((x, y), nodes, size)
-
-    # Отслеживание выбранных материала и шага сетки, получение вектора сил
+    # Отслеживание выбранных материала и шага сетки
     def stepSelected(self,value): 
         self.STEP = float(self.STEPS[value]) # Шаг сетки
         self.step_box.setText(str(self.STEP))
 
-    def setForces(self,f_value,f_angle,f_nodes,nodes): # Вектор сил
-        return array([[f_value, radians(f_angle)] if index in f_nodes else [0, 0] for index in range(len(nodes))])
+    def solverSelected(self,value): self.SOLVER = self.SOLVERS[value] # Метод решения системы
+
+    # Установка ползунков нагрузки без пересчёта: угол из поля ввода, величина - 100 % от введённой силы
+    def syncLoadSliders(self,f_angle):
+        for slider, value in ((self.angleSlider, round(f_angle)), (self.forceSlider, 100)):
+            slider.blockSignals(True)
+            slider.setValue(value)
+            slider.blockSignals(False)
+        self.angle_box.setText(f'{self.angleSlider.value()}°')
+        self.force_box.setText(f'{self.forceSlider.value()} %')
     
     # Валидация данных
     def validate(self, value, name, min_value=None, max_value=None):
@@ -97,25 +119,28 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             return False, f'значение в поле "{name}" не может быть больше {max_value}'
         return True, float_value
         
-    # Метод для выполнения необходимых расчётов
-    def calculate(self,_E,mu,elems,nodes,t,F,r_nodes):
-        E = (_E / (1 - mu**2)) * array([[1, mu, 0], [mu, 1, 0], [0, 0, (1 - mu) / 2]]) # Матрица упругости
-        global_matrix, Bs = calc_global_matrix(elems, nodes, E, t) # Расчёт глобальной матрицы жёсткости
-        global_matrix, self.F = add_supports(global_matrix, F, r_nodes)  # Добавляем шарнирно-неподвижные опоры
-        displaced_nodes, displacements = calc_displacements(global_matrix, F, nodes) # Расчёт смещений
-        stresses, strains, stresses_eq, strains_eq = calc_stresses_and_strains(elems, E, Bs, displacements) # Расчет напряжений и деформаций
-        return displaced_nodes, stresses, strains, stresses_eq, strains_eq
+    # Пересчёт результатов при перемещении ползунков угла и величины силы: суперпозиция единичных откликов без повторного решения
+    def scrubLoad(self):
+        self.angle_box.setText(f'{self.angleSlider.value()}°')
+        self.force_box.setText(f'{self.forceSlider.value()} %')
+        success, f_value = self.validate(self.forceInput.text(), 'Сила', 0)
+        if not self.solver or not success or self.isBusy(): return
+
+        f_value, f_angle = f_value * self.forceSlider.value() / 100, self.angleSlider.value()
+        self.angleInput.setText(str(f_angle))
+        self.solve_info = {'iterations': 0, 'residuals': [], 'converged': True, 'fallback': False, 'solver': 'superposition'}
+        self.draw(self.solver.results(self.solver.superpose(f_value, f_angle), f_value, f_angle, self.smoothCheck.isChecked()))
     
     # Основной метод
     def execute(self):
-        fields = [self.thicknessInput.text(), self.forceInput.text(), self.angleInput.text()]
+        fields = [self.thicknessInput.text(), self.forceInput.text(), self.angleInput.text(), self.tolInput.text(), self.maxiterInput.text()]
 
         if any(input_value == '' for input_value in fields):
             QMessageBox.warning(self, 'ОШИБКА', 'Заполните все поля!')
             return
 
         validation_results = [self.validate(field, name, *limits) for field, name, limits in
-            zip(fields, ['Толщина', 'Сила', 'Угол'], [(0, 1), (0, None), (0, 360)])]
+            zip(fields, ['Толщина', 'Сила', 'Угол', 'Точность', 'Итераций'], [(0, 1), (0, None), (0, 360), (0, 1), (1, None)])]
 
         validation_errors = [message for success, message in validation_results if not success]
 
@@ -123,30 +148,121 @@ class MainWindow(QMainWindow, Ui_MainWindow):
             QMessageBox.warning(self, 'ОШИБКА', f'Нарушены следующие условия: {", ".join(validation_errors)}!')
             return
 
-        t, f_value, f_angle = [result[1] for result in validation_results] # Толщина, значение силы, угол приложения
+        t, f_value, f_angle, tol, maxiter = [result[1] for result in validation_results] # Толщина, значение силы, угол приложения, параметры решателя
 
-        # Точки и элементы фигуры
-        if self.ANSYS == True: nodes, elems = self.ansys_nodes, self.ansys_elems
-        else:
-            nodes = filter_nodes(*create_mesh(h, a, figure_edges, circles, self.STEP), circle_centers, figure_edges, circles)
-            elems = triangulate(nodes,circles)
+        # Расчёт выполняется в отдельном потоке; новый запуск отменяет устаревший
+        self.startJob({'young': self._E, 'poisson': self.mu, 'thickness': t, 'force': f_value, 'angle': f_angle, 'step': self.STEP,
+                       'nodes': self.ansys_nodes if self.ANSYS else None, 'elems': self.ansys_elems if self.ANSYS else None,
+                       'solver_options': dict(tol=tol, maxiter=int(maxiter), **self.SOLVER), 'nodal': self.smoothCheck.isChecked(),
+                       'last_solution': self.last_solution})
+
+    # Методы для работы с потоком расчёта
+    def isBusy(self): return self.worker is not None and self.worker.isRunning()
+    def startJob(self, params):
+        self.pending_job = params
+        if self.isBusy(): self.worker.requestInterruption() # Запуск после завершения отменённого расчёта
+        else: self.launchPendingJob()
+
+    # finished приходит в поток интерфейса с задержкой: за это время startJob мог уже запустить новый поток
+    def workerFinished(self):
+        if self.sender() is self.worker: self.launchPendingJob()
+
+    def launchPendingJob(self):
+        params, self.pending_job = self.pending_job, None
+        if params is None:
+            self.worker = None # Завершившийся поток удаляется (deleteLater)
+            self.setLoadSlidersEnabled(self.solver is not None and self.solver.unit_responses is not None)
+            self.progressBar.hide()
+            self.cancelButton.hide()
+            return
+        self.worker = AnalysisWorker(params, self)
+        self.worker.progress.connect(self.showProgress)
+        self.worker.resultReady.connect(self.showResults)
+        self.worker.failed.connect(self.showError)
+        self.worker.finished.connect(self.workerFinished)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.setLoadSlidersEnabled(False) # До готовности единичных откликов нового расчёта
+        self.progressBar.show()
+        self.cancelButton.show()
+        self.worker.start()
+
+    def cancelJob(self):
+        self.pending_job = None
+        if self.isBusy():
+            self.worker.requestInterruption()
+            self.cancelButton.hide()
+            self.statusBar().showMessage('Расчёт отменён')
 
-        r_nodes,f_nodes = self.get_rivets_and_force_nodes(circles,nodes,h,a,self.STEP/2) # Точки заклёпок и приложения сил
-        Forces = self.setForces(f_value,f_angle,f_nodes,nodes) # Вектор сил
+    # Закрытие окна: расчёт отменяется и поток дожидается завершения (уничтожение работающего QThread аварийно завершает процесс)
+    def closeEvent(self, event):
+        self.pending_job = None
+        if self.isBusy():
+            self.worker.requestInterruption()
+            self.worker.wait()
+        super().closeEvent(event)
+
+    def showProgress(self, percent, stage):
+        if self.sender() is not self.worker or self.worker.isInterruptionRequested(): return # Ход отменённого расчёта
+        self.progressBar.setValue(percent)
+        self.statusBar().showMessage(stage)
+
+    def setLoadSlidersEnabled(self, enabled):
+        self.angleSlider.setEnabled(enabled)
+        self.forceSlider.setEnabled(enabled)
+
+    def showError(self, message): QMessageBox.critical(self, 'ОШИБКА', message)
+
+    def showResults(self, solver, results, solve_info):
+        if self.sender() is not self.worker or self.pending_job is not None: return # Результат устаревшего расчёта
+        self.solver, self.solve_info = solver, solve_info
+        self.last_solution = (solver.mesh_key, results['displacements'])
+        self.syncLoadSliders(self.worker.params['angle'])
         # Точки после деформации фигуры, напряжения и деформации + эквивалентные значения
-        displaced_nodes, stresses, strains, stresses_eq, strains_eq = self.calculate(self._E,self.mu,elems,nodes,t,Forces,r_nodes)
-        
-        # Инициализация графиков
-        fig1, axes1 = initGraph(rows=1,cols=2,top=0.94,bottom=0.094,left=0.052,right=0.988,hspace=0.2,wspace=0.142)
-        fig2, axes2 = initGraph(rows=2,cols=3,top=0.908,bottom=0.094,left=0.033,right=0.972,hspace=0.494,wspace=0.178)
-        fig3, axes3 = initGraph(rows=1,cols=2,top=0.908,bottom=0.094,left=0.057,right=0.965,hspace=0.2,wspace=0.212)
-        # Графики модели, напряжений и деформаций
-        drawModel(axes1, elems, nodes, displaced_nodes, Forces, f_nodes, r_nodes)
-        drawStrainsStresses(axes2, axes3 ,elems,displaced_nodes,stresses,strains,stresses_eq,strains_eq)
-        updateGraphs(fig1, fig2, fig3, self) # Обновление холстов
+        self.draw(results)
+        if self.report_startup:
+            print(f'Первые результаты за {perf_counter() - START_TIME:.3f} с')
+            self.report_startup = False
+
+    # Сохранение результатов, построение графиков видимой вкладки и вывод сведений о решении по результатам Solver.results
+    def draw(self,results):
+        self.results, self.triangulations = results, {}
+        self.F, self.reactions = results['forces'], results['reactions']
+        self.stale_tabs = set(range(self.tabWidget.count())) # Остальные вкладки строятся при переключении на них
+        self.drawTab(self.tabWidget.currentIndex())
+        self.statusBar().showMessage(f'Итераций: {self.solve_info["iterations"]}' + (' (прямое решение)' if self.solve_info['fallback'] else '') +
+            ' | Реакции заклёпок (Rx, Ry): ' + '; '.join(f'{i + 1}: ({rx:.3g}, {ry:.3g})' for i, (rx, ry) in enumerate(self.reactions)))
+
+    # Смена способа вывода: все вкладки строятся заново
+    def redrawTabs(self):
+        if self.results is None: return
+        self.stale_tabs = set(range(self.tabWidget.count()))
+        self.drawTab(self.tabWidget.currentIndex())
+
+    # Построение графиков вкладки (модель, напряжения и деформации, эквивалентные значения), если они устарели
+    def drawTab(self,index):
+        if index not in self.stale_tabs: return
+        native = self.nativeCheck.isChecked()
+        if native: import qt_graphics as backend # Быстрый вывод средствами Qt
+        else: import graphics as backend # matplotlib загружается при первом построении
+        solver, results = self.solver, self.results
+        if native not in self.triangulations: # Общая для всех вкладок
+            self.triangulations[native] = backend.get_triangulation(results['displaced_nodes'], solver.elems)
+        triangulation = self.triangulations[native]
+        if (native, index) not in self.graphs: self.graphs[native, index] = backend.initTabGraph(self, index)
+        for (graph_native, graph_index), graph in self.graphs.items():
+            if graph_index == index: graph.setVisible(graph_native == native)
+        graph = self.graphs[native, index]
+        if index == 0: backend.drawModel(graph, triangulation, solver.nodes, self.F, solver.f_nodes, solver.r_nodes)
+        elif index == 1: backend.drawStrainsStresses(graph, triangulation, results['stresses'], results['strains'])
+        else: backend.drawEquivalent(graph, triangulation, results['stresses_eq'], results['strains_eq'])
+        graph.refresh()
+        self.stale_tabs.discard(index)
 
 if __name__ == '__main__':
     app = QApplication(argv)
     main = MainWindow()
     main.show()
+    if '--startup-time' in argv:
+        main.report_startup = True
+        QTimer.singleShot(0, lambda: print(f'Окно открыто за {perf_counter() - START_TIME:.3f} с'))
     exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,220 @@
+from numpy import array, linspace, interp, column_stack, clip, isnan, uint32, zeros, ascontiguousarray, concatenate, linalg, cos, sin, nan_to_num
+from PyQt5.QtCore import Qt, QPointF, QLineF, QRectF, QRect
+from PyQt5.QtGui import QImage, QPainter, QColor, QPen, QPolygonF
+from PyQt5.QtWidgets import QWidget, QGridLayout
+from raster import rasterize, colors, get_edges, get_outline_edges, LOD_ELEMENTS
+
+# Вывод сетки и полей средствами Qt (QPainter, QImage) без matplotlib: быстрее при запуске и перерисовке.
+# Функции повторяют интерфейс graphics (initTabGraph, get_triangulation, drawModel, drawStrainsStresses,
+# drawEquivalent); для публикации графиков используется вывод matplotlib
+
+# Таблица цветов ARGB с линейной интерполяцией между опорными цветами (как LinearSegmentedColormap с N=256)
+def get_color_table(colors, size=256):
+    rgb = array([[int(color[i:i + 2], 16) for i in (1, 3, 5)] for color in colors], dtype=float)
+    t, positions = linspace(0, 1, size), linspace(0, 1, len(colors))
+    r, g, b = (interp(t, positions, rgb[:, k]).round().astype(uint32) for k in range(3))
+    return 0xFF000000 | (r << 16) | (g << 8) | b
+
+COLOR_TABLE = get_color_table(colors)
+
+# Цвета по значениям: нормировка на [vmin, vmax] как в matplotlib; nan - прозрачный
+def map_colors(values, vmin, vmax):
+    scaled = (values - vmin) / (vmax - vmin) if vmax > vmin else zeros(values.shape)
+    argb = COLOR_TABLE[clip((nan_to_num(scaled) * len(COLOR_TABLE)).astype(int), 0, len(COLOR_TABLE) - 1)]
+    argb[isnan(values)] = 0
+    return argb
+
+# Деформированная сетка для вывода (в graphics - Triangulation matplotlib)
+class MeshTriangulation:
+    def __init__(self, displaced_nodes, elems):
+        self.nodes, self.triangles = displaced_nodes, elems
+        self.x, self.y = displaced_nodes[:, 0], displaced_nodes[:, 1]
+
+def get_triangulation(displaced_nodes, elems): return MeshTriangulation(displaced_nodes, elems)
+
+# Виджет сетки: заливка значений (растр QImage), рёбра, точки и стрелки; сдвиг левой кнопкой мыши,
+# масштаб колесом, двойной щелчок - показать всё
+class MeshView(QWidget):
+    MARGIN = 28 # Поля вокруг области построения
+    COLORBAR = 72 # Ширина цветовой шкалы с подписями
+
+    def __init__(self, title, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.nodes = self.values = None
+        self.view = None # (центр x, центр y, пикселей на единицу длины)
+        self.fitted = True # Подгонять вид при изменении размера, пока пользователь не сдвинул/масштабировал
+        self.image_key = self.drag = None
+        self.setMinimumSize(160, 120)
+
+    # Данные вывода: values - по элементам или узлам (или None), edges - рёбра (или None), outline - контур
+    # для мелкого масштаба больших сеток, markers - [(точки, цвет)], arrows - (начала, векторы)
+    def setData(self, nodes, elems, values=None, edges=None, outline=None, markers=(), arrows=None):
+        self.nodes, self.elems, self.values = nodes, elems, values
+        self.edges, self.outline, self.markers, self.arrows = edges, outline, markers, arrows
+        if values is not None: self.vmin, self.vmax = values.min(), values.max()
+        if outline is not None: self.centers = nodes[elems].mean(axis=1)
+        self.image_key = None
+        if self.fitted or self.view is None: self.fit()
+        else: self.update()
+
+    def plotRect(self):
+        colorbar = self.COLORBAR if self.values is not None else 0
+        return QRect(self.MARGIN, self.MARGIN, max(self.width() - 2 * self.MARGIN - colorbar, 1), max(self.height() - 2 * self.MARGIN, 1))
+
+    def fit(self):
+        self.fitted = True
+        if self.nodes is None: return
+        points = self.nodes if self.arrows is None else concatenate((self.nodes, self.arrows[0] + self.arrows[1]))
+        lo, hi = points.min(axis=0), points.max(axis=0)
+        size, rect = (hi - lo).clip(1e-12), self.plotRect()
+        scale = min(rect.width() / size[0], rect.height() / size[1]) * 0.95
+        self.view = ((lo[0] + hi[0]) / 2, (lo[1] + hi[1]) / 2, scale)
+        self.update()
+
+    # Пределы области построения (x0, x1, y0, y1) в координатах модели
+    def extent(self, rect):
+        cx, cy, scale = self.view
+        return cx - rect.width() / 2 / scale, cx + rect.width() / 2 / scale, cy - rect.height() / 2 / scale, cy + rect.height() / 2 / scale
+
+    def toPixels(self, points, rect):
+        x0, _, _, y1 = self.extent(rect)
+        scale = self.view[2]
+        return column_stack((rect.left() + (points[:, 0] - x0) * scale, rect.top() + (y1 - points[:, 1]) * scale))
+
+    # Растр значений по размеру области построения; пересчитывается только при изменении вида
+    def fieldImage(self, rect):
+        key = (self.view, rect.width(), rect.height())
+        if key != self.image_key:
+            data = rasterize(self.nodes, self.elems, self.values, self.extent(rect), rect.width(), rect.height())[::-1]
+            self.buffer = ascontiguousarray(map_colors(data, self.vmin, self.vmax), dtype=uint32)
+            self.image = QImage(self.buffer.data, rect.width(), rect.height(), 4 * rect.width(), QImage.Format_ARGB32)
+            self.image_key = key
+        return self.image
+
+    # Рёбра для вывода: все, либо для больших сеток - видимые при увеличении и контур при мелком масштабе
+    def visibleEdges(self, rect):
+        if self.outline is None: return self.edges
+        x0, x1, y0, y1 = self.extent(rect)
+        centers = self.centers
+        visible = ((centers[:, 0] >= x0) & (centers[:, 0] <= x1) & (centers[:, 1] >= y0) & (centers[:, 1] <= y1)).nonzero()[0]
+        return get_edges(self.elems[visible]) if len(visible) <= LOD_ELEMENTS else self.outline
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.white)
+        painter.drawText(QRectF(0, 0, self.width(), self.MARGIN), Qt.AlignCenter, self.title)
+        if self.nodes is None: return
+        rect = self.plotRect()
+        painter.setClipRect(rect)
+        if self.values is not None: painter.drawImage(rect.topLeft(), self.fieldImage(rect))
+
+        edges = self.visibleEdges(rect) if self.edges is not None else None
+        if edges is not None and len(edges):
+            painter.setPen(QPen(QColor('#1E90FF'), 1))
+            segments = self.toPixels(self.nodes, rect)[edges].reshape(-1, 4)
+            painter.drawLines([QLineF(*segment) for segment in segments.tolist()])
+
+        painter.setRenderHint(QPainter.Antialiasing)
+        for points, color in self.markers:
+            painter.setPen(QColor(color))
+            painter.setBrush(QColor(color))
+            for x, y in self.toPixels(points, rect).tolist(): painter.drawEllipse(QPointF(x, y), 3, 3)
+
+        if self.arrows is not None:
+            origins, vectors = self.arrows
+            starts, ends = self.toPixels(origins, rect), self.toPixels(origins + vectors, rect)
+            painter.setPen(QPen(QColor('#FF0000'), 2))
+            painter.setBrush(QColor('#FF0000'))
+            for (x0, y0), (x1, y1) in zip(starts.tolist(), ends.tolist()):
+                length = ((x1 - x0) ** 2 + (y1 - y0) ** 2) ** 0.5
+                if length == 0: continue
+                ux, uy = (x1 - x0) / length, (y1 - y0) / length
+                painter.drawLine(QLineF(x0, y0, x1, y1))
+                painter.drawPolygon(QPolygonF([QPointF(x1, y1), QPointF(x1 - 10 * ux - 4 * uy, y1 - 10 * uy + 4 * ux),
+                                               QPointF(x1 - 10 * ux + 4 * uy, y1 - 10 * uy - 4 * ux)]))
+
+        painter.setClipping(False)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.setPen(Qt.black)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(rect)
+        if self.values is not None: self.drawColorbar(painter, rect)
+
+    def drawColorbar(self, painter, rect):
+        bar = QRect(rect.right() + 12, rect.top(), 14, rect.height())
+        self.colorbar = ascontiguousarray(COLOR_TABLE[::-1], dtype=uint32) # Сверху - наибольшее значение
+        painter.drawImage(bar, QImage(self.colorbar.data, 1, len(self.colorbar), 4, QImage.Format_ARGB32))
+        painter.drawRect(bar)
+        for value in linspace(self.vmin, self.vmax, 5):
+            y = bar.bottom() - (value - self.vmin) / ((self.vmax - self.vmin) or 1) * bar.height()
+            painter.drawText(QRectF(bar.right() + 4, y - 8, self.COLORBAR, 16), Qt.AlignLeft | Qt.AlignVCenter, f'{value:.3g}')
+
+    def resizeEvent(self, event):
+        if self.fitted: self.fit()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self.view is not None: self.drag = (event.pos(), self.view)
+
+    def mouseMoveEvent(self, event):
+        if self.drag is None: return
+        (_, (cx, cy, scale)), delta = self.drag, event.pos() - self.drag[0]
+        self.view, self.fitted = (cx - delta.x() / scale, cy + delta.y() / scale, scale), False
+        self.update()
+
+    def mouseReleaseEvent(self, event): self.drag = None
+    def mouseDoubleClickEvent(self, event): self.fit()
+
+    # Масштаб относительно точки под курсором
+    def wheelEvent(self, event):
+        if self.view is None: return
+        cx, cy, scale = self.view
+        factor, rect = 1.2 ** (event.angleDelta().y() / 120), self.plotRect()
+        x0, _, _, y1 = self.extent(rect)
+        px, py = x0 + (event.pos().x() - rect.left()) / scale, y1 - (event.pos().y() - rect.top()) / scale
+        self.view, self.fitted = (px - (px - cx) / factor, py - (py - cy) / factor, scale * factor), False
+        self.update()
+
+# Вкладка с сеткой виджетов MeshView; views - в порядке заголовков
+class NativePanel(QWidget):
+    def __init__(self, layout, titles, cols):
+        super().__init__()
+        grid = QGridLayout(self)
+        self.views = [MeshView(title, self) for title in titles]
+        for i, view in enumerate(self.views): grid.addWidget(view, i // cols, i % cols)
+        layout.addWidget(self)
+
+    def refresh(self):
+        for view in self.views: view.update()
+
+TAB_TITLES = [(['Модель до воздействия сил', 'Модель после воздействия сил'], 2),
+              (['Продольная деформация вдоль оси X', 'Продольная деформация вдоль оси Y', 'Сдвиговая деформация',
+                'Нормальное напряжение по оси X', 'Нормальное напряжение по оси Y', 'Сдвиговое напряжение'], 3),
+              (['Эквивалентная деформация', 'Эквивалентное напряжение'], 2)]
+
+# Функция для создания вкладки при первом её показе
+def initTabGraph(self, index):
+    layout = (self.companovka_for_mpl1, self.companovka_for_mpl2, self.companovka_for_mpl3)[index]
+    return NativePanel(layout, *TAB_TITLES[index])
+
+#Отображение графиков модели
+def drawModel(panel, triangulation, _nodes, F, force_points, rivets_nodes):
+    elems = triangulation.triangles
+    large = len(elems) > LOD_ELEMENTS
+    edges = None if large else get_edges(elems)
+    outline = get_outline_edges(elems, rivets_nodes) if large else None
+    magnitude, angle = F[force_points, 0] / linalg.norm(F, axis=1).max(), F[force_points, 1]
+    arrows = column_stack((magnitude * cos(angle), magnitude * sin(angle)))
+    for view, nodes in zip(panel.views, (_nodes, triangulation.nodes)):
+        view.setData(nodes, elems, edges=edges if edges is not None else outline, outline=outline,
+                     markers=[(nodes[rivets_nodes], '#FF4500'), (nodes[force_points], '#8B0000')], arrows=(nodes[force_points], arrows))
+
+#Отображение графиков напряжений и деформаций
+def drawStrainsStresses(panel, triangulation, stresses, strains):
+    for view, values in zip(panel.views, (strains[:, 0], strains[:, 1], strains[:, 2], stresses[:, 0], stresses[:, 1], stresses[:, 2])):
+        view.setData(triangulation.nodes, triangulation.triangles, values)
+
+#Отображение графиков эквивалентных напряжений и деформаций
+def drawEquivalent(panel_eq, triangulation, stresses_eq, strains_eq):
+    for view, values in zip(panel_eq.views, (strains_eq, stresses_eq)):
+        view.setData(triangulation.nodes, triangulation.triangles, values)
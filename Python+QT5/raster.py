@@ -0,0 +1,58 @@
+from numpy import ceil, floor, clip, repeat, arange, cumsum, full, nan, errstate, sort, unique, int64, concatenate, isin
+
+LOD_ELEMENTS = 20000 # Число (видимых) элементов, начиная с которого сетка и поля выводятся с уровнем детализации (контур, растр)
+
+colors = ['#0000FF', '#00FFFF', '#00FF00', '#FFFF00', '#FF0000'] # Цветовая шкала полей (общая для matplotlib и Qt)
+
+# Уникальные рёбра элементов (пары индексов узлов, меньший первым); при return_counts - и число элементов при каждом ребре
+def get_edges(elems, return_counts=False):
+    pairs = sort(elems[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    _, index, counts = unique(pairs[:, 0].astype(int64) * (pairs.max() + 1) + pairs[:, 1], return_index=True, return_counts=True)
+    return (pairs[index], counts) if return_counts else pairs[index]
+
+# Контур: рёбра одного элемента (внешняя граница и отверстия) и рёбра между узлами заклёпок
+def get_outline_edges(elems, rivets_nodes):
+    edges, counts = get_edges(elems, return_counts=True)
+    return concatenate((edges[counts == 1], edges[(counts > 1) & isin(edges, rivets_nodes).all(axis=1)]))
+
+# Растеризация треугольной сетки на сетку пикселей в пределах extent = (x0, x1, y0, y1): значение в центре
+# каждого пикселя. Для значений по элементам - значение элемента, содержащего центр пикселя, для узловых -
+# линейная интерполяция по барицентрическим координатам; вне сетки - nan. Строка 0 соответствует y0.
+# Проверяются только пиксели ограничивающих прямоугольников видимых элементов, поэтому затраты
+# растут с числом элементов и пикселей, а не с их произведением
+def rasterize(nodes, elems, values, extent, width, height):
+    x0, x1, y0, y1 = extent
+    image = full(height * width, nan)
+    # Координаты узлов в пикселях: центр пикселя i находится в точке i
+    px = (nodes[:, 0] - x0) * (width / (x1 - x0)) - 0.5
+    py = (nodes[:, 1] - y0) * (height / (y1 - y0)) - 0.5
+    tx, ty = px[elems], py[elems]
+
+    ix0, ix1 = clip(ceil(tx.min(axis=1)), 0, width).astype(int), clip(floor(tx.max(axis=1)), -1, width - 1).astype(int)
+    iy0, iy1 = clip(ceil(ty.min(axis=1)), 0, height).astype(int), clip(floor(ty.max(axis=1)), -1, height - 1).astype(int)
+    cols, rows = ix1 - ix0 + 1, iy1 - iy0 + 1
+    visible = ((cols > 0) & (rows > 0)).nonzero()[0]
+    if len(visible) == 0: return image.reshape(height, width)
+
+    # Пары (элемент, пиксель его ограничивающего прямоугольника)
+    counts = cols[visible] * rows[visible]
+    tri = repeat(visible, counts)
+    local = arange(counts.sum()) - repeat(cumsum(counts) - counts, counts)
+    ix, iy = ix0[tri] + local % cols[tri], iy0[tri] + local // cols[tri]
+
+    # Барицентрические координаты центров пикселей
+    (ax, bx, cx), (ay, by, cy) = tx[tri].T, ty[tri].T
+    with errstate(divide='ignore', invalid='ignore'):
+        d = (by - cy) * (ax - cx) + (cx - bx) * (ay - cy)
+        l1 = ((by - cy) * (ix - cx) + (cx - bx) * (iy - cy)) / d
+        l2 = ((cy - ay) * (ix - cx) + (ax - cx) * (iy - cy)) / d
+    l3 = 1 - l1 - l2
+    eps = -1e-9
+    inside = (l1 >= eps) & (l2 >= eps) & (l3 >= eps)
+
+    tri, pixels = tri[inside], iy[inside] * width + ix[inside]
+    if len(values) == len(elems): image[pixels] = values[tri]
+    else:
+        vertices = elems[tri]
+        image[pixels] = l1[inside] * values[vertices[:, 0]] + l2[inside] * values[vertices[:, 1]] + l3[inside] * values[vertices[:, 2]]
+    return image.reshape(height, width)
@@ -0,0 +1,89 @@
+from math import radians
+from numpy import asarray, zeros
+from calculations import (NodeIndex, getRivets, getForceNodes, get_mesh_key, calc_displacements_constrained, calc_reactions,
+                          get_rivet_reactions, calc_stresses_and_strains, recover_nodal_values, calc_unit_responses, superpose_unit_responses)
+from cache import get_mesh, get_assembled_system, get_averaging_matrix
+from spectrum import evaluate_load_spectrum, SPECTRUM_BLOCK_SIZE
+from geometry import h, a, figure_edges, circles, circle_centers
+
+# Расчёт заклёпочного соединения без графического интерфейса. Объект хранит только свою сетку и
+# собранную систему; общие кэши (сетки, системы, разложения) не меняют результатов и защищены
+# блокировками, поэтому несколько объектов можно использовать независимо, в том числе из разных потоков.
+# При заданном store (store.ArrayStore) узлы, элементы, матрицы B и поля по элементам хранятся в его
+# подкаталоге для отпечатка сетки, в файлах, отображаемых в память, и передаются между этапами без копирования
+class Solver:
+    def __init__(self, young, poisson, thickness, step=0.5, nodes=None, elems=None, store=None):
+        self.young, self.poisson, self.thickness, self.step, self.store = young, poisson, thickness, step, store
+        if nodes is None: nodes, elems = get_mesh(h, a, figure_edges, circles, circle_centers, step) # Сетка из дискового кэша или построенная заново
+        self.nodes, self.elems = asarray(nodes, dtype=float), asarray(elems, dtype=int)
+        self.mesh_key = get_mesh_key(self.nodes, self.elems)
+        if store is not None:
+            self.store = store = store.namespace(self.mesh_key) # Массивы разных сеток не перезаписывают друг друга
+            self.nodes, self.elems = [store.get(name) if name in store else store.put(name, values)
+                                      for name, values in (('nodes', self.nodes), ('elems', self.elems))]
+        self.cache_key = (self.mesh_key, young, poisson, thickness)
+
+        self.index = NodeIndex(self.nodes) # Пространственный индекс узлов
+        self.r_nodes = getRivets(circles, self.nodes, self.index) # Точки заклёпок
+        self.f_nodes = getForceNodes((h, a), self.nodes, step / 2, self.index) # Точки приложения силы
+        self.E, self.global_matrix, self.Bs = get_assembled_system(self.elems, self.nodes, young, poisson, thickness, self.mesh_key, store)
+        self.unit_responses = None
+
+    # Вектор сил (значение, угол в рад); нагрузки в шарнирно-неподвижных опорах не учитываются
+    def forces(self, force, angle):
+        F = zeros((len(self.nodes), 2))
+        F[self.f_nodes] = [force, radians(angle)]
+        F[self.r_nodes] = [0, 0]
+        return F
+
+    # Решение системы: смещения узлов (n, 2) и сведения о решении. solver_options - параметры calc_displacements_constrained
+    def solve(self, force, angle, **solver_options):
+        _, displacements, solve_info = calc_displacements_constrained(self.global_matrix, self.forces(force, angle), self.nodes,
+                                                                      self.r_nodes, cache_key=self.cache_key, **solver_options)
+        return displacements, solve_info
+
+    # Единичные отклики для superpose. Без solver_options или при solver='direct' - одно решение блока из двух
+    # правых частей по разложению; итерационные методы решают две системы без разложения матрицы
+    def prepare_superposition(self, **solver_options):
+        if self.unit_responses is not None: return
+        if solver_options.get('solver', 'direct') == 'direct':
+            self.unit_responses = calc_unit_responses(self.global_matrix, self.nodes, self.r_nodes, self.f_nodes, self.cache_key)
+        else:
+            solver_options.pop('x0', None)
+            self.unit_responses = tuple(self.solve(1.0, angle, **solver_options)[0] for angle in (0, 90))
+
+    # Смещения от силы заданной величины и угла по единичным откликам (без повторного решения)
+    def superpose(self, force, angle):
+        self.prepare_superposition()
+        return superpose_unit_responses(self.unit_responses, force, radians(angle))
+
+    # Результаты по смещениям: деформированные узлы, реакции заклёпок, напряжения и деформации
+    # по элементам или, при nodal=True, осреднённые по узлам. С хранилищем поля по элементам пишутся
+    # в его файлы на месте: следующий вызов для той же сетки перезаписывает массивы предыдущих результатов
+    def results(self, displacements, force, angle, nodal=False):
+        F = self.forces(force, angle)
+        out = None
+        if self.store is not None:
+            ne = len(self.elems)
+            out = tuple(self.store.create(name, shape, reuse=True) for name, shape in
+                        (('stresses', (ne, 3)), ('strains', (ne, 3)), ('stresses_eq', (ne,)), ('strains_eq', (ne,))))
+        stresses, strains, stresses_eq, strains_eq = calc_stresses_and_strains(self.elems, self.E, self.Bs, displacements, out)
+        if nodal:
+            averaging_matrix = get_averaging_matrix(self.elems, self.nodes, self.mesh_key)
+            stresses, strains, stresses_eq, strains_eq = recover_nodal_values(averaging_matrix, stresses, strains, stresses_eq, strains_eq)
+        reactions = get_rivet_reactions(circles, self.nodes, calc_reactions(self.global_matrix, displacements, F), self.index)
+        return {'forces': F, 'displacements': displacements, 'displaced_nodes': self.nodes + displacements, 'reactions': reactions,
+                'stresses': stresses, 'strains': strains, 'stresses_eq': stresses_eq, 'strains_eq': strains_eq}
+
+    # Полный расчёт для силы заданной величины и угла (°)
+    def analyse(self, force, angle, nodal=False, **solver_options):
+        displacements, solve_info = self.solve(force, angle, **solver_options)
+        results = self.results(displacements, force, angle, nodal)
+        results['solve_info'] = solve_info
+        return results
+
+    # Спектр нагрузок: пиковые эквивалентные напряжения и деформации для каждого шага истории (файл или
+    # итерируемый объект пар величина, угол в °) записываются в output_path; возвращаются общие пики
+    def load_spectrum(self, history, output_path, block_size=SPECTRUM_BLOCK_SIZE):
+        return evaluate_load_spectrum(history, self.global_matrix, self.nodes, self.elems, self.E, self.Bs,
+                                      self.r_nodes, self.f_nodes, output_path, self.cache_key, block_size)
@@ -0,0 +1,68 @@
+from itertools import islice
+from math import radians
+from numpy import array, zeros, full, cos, sin, einsum, asarray, inf, maximum
+from calculations import get_constrained_solver, calc_equivalent_values, element_chunks
+
+SPECTRUM_BLOCK_SIZE = 256 # Число шагов нагружения, решаемых одним блоком правых частей
+SPECTRUM_CHUNK_VALUES = 1 << 20 # Произведение числа элементов и шагов в блоке расчёта напряжений
+
+# Чтение истории нагружения из файла: в каждой строке величина силы и угол (°), разделённые
+# табуляцией, пробелами или ';'; допускается десятичная запятая. Нечисловые строки (заголовки) пропускаются
+def read_load_history(path):
+    with open(path) as file:
+        for line in file:
+            values = line.replace(';', ' ').split()
+            if len(values) < 2: continue
+            try:
+                yield float(values[0].replace(',', '.')), float(values[1].replace(',', '.'))
+            except ValueError:
+                continue
+
+# Оценка спектра нагрузок: для каждого шага (величина, угол в °) из history (файл или итерируемый объект)
+# в output_path записываются пиковые эквивалентные напряжение и деформация. Шаги решаются блоками
+# по block_size правых частей с одним разложением на всю историю, поэтому память не зависит от её длины
+def evaluate_load_spectrum(history, global_matrix, nodes, elems, E, Bs, r_nodes, f_nodes, output_path,
+                           cache_key=None, block_size=SPECTRUM_BLOCK_SIZE):
+    if isinstance(history, str): history = read_load_history(history)
+    history = iter(history)
+    elems = asarray(elems, dtype=int)
+    f_dofs = asarray(f_nodes, dtype=int) * 2
+    peaks = {'steps': 0, 'stress_eq': 0.0, 'strain_eq': 0.0}
+    solve_block = get_constrained_solver(global_matrix, r_nodes, cache_key)
+
+    with open(output_path, 'w') as output:
+        output.write('step\tforce\tangle\tmax_stress_eq\tmax_strain_eq\tmax_stress_elem\n')
+        while True:
+            block = array(list(islice(history, block_size)), dtype=float).reshape(-1, 2)
+            if not len(block): break
+
+            angles = array([radians(angle) for angle in block[:, 1]])
+            force_vectors = zeros((len(nodes) * 2, len(block)))
+            force_vectors[f_dofs] = block[:, 0] * cos(angles)
+            force_vectors[f_dofs + 1] = block[:, 0] * sin(angles)
+            displacements = solve_block(force_vectors)
+
+            # Пики по шагам блока: деформации и напряжения (элементы, 3, k) считаются по блокам элементов
+            # размером SPECTRUM_CHUNK_VALUES / k, поэтому память не зависит от числа элементов
+            nodal_displacements = displacements.reshape(len(nodes), 2, -1)
+            max_stresses, max_strains = full(len(block), -inf), full(len(block), -inf)
+            max_stress_elems = zeros(len(block), dtype=int)
+            for chunk in element_chunks(len(elems), max(1, SPECTRUM_CHUNK_VALUES // len(block))):
+                chunk_elems = elems[chunk]
+                strains = einsum('nij,njk->nik', Bs[chunk], nodal_displacements[chunk_elems].reshape(len(chunk_elems), 6, -1))
+                stresses = einsum('ij,njk->nik', E, strains)
+                stresses_eq, strains_eq = calc_equivalent_values(stresses.transpose(1, 0, 2), strains.transpose(1, 0, 2))
+
+                chunk_max = stresses_eq.max(axis=0)
+                greater = chunk_max > max_stresses
+                max_stress_elems[greater] = stresses_eq.argmax(axis=0)[greater] + chunk.start
+                max_stresses[greater] = chunk_max[greater]
+                max_strains = maximum(max_strains, strains_eq.max(axis=0))
+            for i, (force, angle) in enumerate(block):
+                output.write(f'{peaks["steps"] + i + 1}\t{force:.6g}\t{angle:.6g}\t{max_stresses[i]:.6e}\t{max_strains[i]:.6e}\t{max_stress_elems[i]}\n')
+
+            peaks['steps'] += len(block)
+            peaks['stress_eq'] = max(peaks['stress_eq'], float(max_stresses.max()))
+            peaks['strain_eq'] = max(peaks['strain_eq'], float(max_strains.max()))
+
+    return peaks
@@ -0,0 +1,76 @@
+import os
+import shutil
+import weakref
+from itertools import count
+from tempfile import mkdtemp
+from numpy import asarray, memmap, zeros, dtype as as_dtype
+from numpy.lib.format import open_memmap
+
+# Хранилище массивов сетки и результатов в файлах .npy, отображаемых в память. Массивы отдаются
+# представлениями файлов без копирования, а страницы вытесняет ОС, поэтому данные по элементам
+# могут превышать объём памяти. Без directory используется временный каталог, удаляемый при close().
+# Файл, на который могут ссылаться выданные представления, не перезаписывается: он удаляется, а если
+# это невозможно (отображённый файл в Windows), новый массив пишется в другой файл
+class ArrayStore:
+    def __init__(self, directory=None, parent=None):
+        self.parent = parent # Родительское хранилище удерживается, пока используется вложенное
+        if directory is None:
+            directory = mkdtemp(prefix='store-')
+            self.cleanup = weakref.finalize(self, shutil.rmtree, directory, ignore_errors=True)
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self.cleanup = None
+        self.directory = directory
+        self.files, self.versions = {}, count(1) # Имя массива -> файл, если файл по умолчанию ещё занят
+
+    # Вложенное хранилище в подкаталоге name, например для массивов одной сетки
+    def namespace(self, name):
+        return ArrayStore(os.path.join(self.directory, name), parent=self)
+
+    def path(self, name):
+        return os.path.join(self.directory, self.files.get(name, name + '.npy'))
+
+    def __contains__(self, name):
+        return os.path.isfile(self.path(name))
+
+    # Новый массив, заполненный нулями. При reuse=True файл той же формы и типа перезаписывается на месте
+    # (для промежуточных массивов, например полей последнего расчёта): выданные ранее представления видят новые данные
+    def create(self, name, shape, dtype=float, reuse=False):
+        shape, dtype = tuple(shape), as_dtype(dtype)
+        if name in self:
+            if reuse:
+                stored = open_memmap(self.path(name), mode='r+')
+                if stored.shape == shape and stored.dtype == dtype:
+                    stored[...] = 0
+                    return stored
+                del stored
+            self.remove(name)
+            if name in self: self.files[name] = f'{name}.{next(self.versions)}.npy' # Файл отображён и не удалён
+        return open_memmap(self.path(name), mode='w+', dtype=dtype, shape=shape)
+
+    # Массив values в хранилище; массив, уже отображённый из этого файла, не копируется
+    def put(self, name, values):
+        if isinstance(values, memmap) and values.filename == os.path.abspath(self.path(name)):
+            return values
+        values = asarray(values)
+        stored = self.create(name, values.shape, values.dtype)
+        stored[...] = values
+        return stored
+
+    # Массив из хранилища (только чтение) или None
+    def get(self, name, mode='r'):
+        return open_memmap(self.path(name), mode=mode) if name in self else None
+
+    # Удаление файла массива; отображённый файл (Windows) остаётся до очистки каталога
+    def remove(self, name):
+        try:
+            os.remove(self.path(name))
+        except OSError:
+            pass
+
+    def close(self):
+        if self.cleanup is not None: self.cleanup()
+
+# Новый массив: в памяти или, если задано хранилище, в его файле name
+def allocate(store, name, shape, dtype=float):
+    return zeros(shape, dtype) if store is None else store.create(name, shape, dtype)
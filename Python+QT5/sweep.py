@@ -0,0 +1,92 @@
+import os
+import rapidjson
+from argparse import ArgumentParser
+from itertools import product
+from time import perf_counter
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from numpy import ndarray, asarray, linalg
+from calculations import calc_stresses_and_strains
+from cache import get_mesh
+from solver import Solver
+from geometry import h, a, figure_edges, circles, circle_centers
+
+SUMMARY_COLUMNS = ['material', 'young', 'poisson', 'thickness', 'force', 'angle', 'step', 'nodes', 'elems',
+                   'max_displacement', 'max_stress_eq', 'max_strain_eq', 'solve_time']
+
+_attached_meshes = {} # Сетки из разделяемой памяти, подключённые в процессе-исполнителе
+
+# Размещение массива в разделяемой памяти; возвращает блок и описание (имя, форма, тип) для исполнителей
+def share_array(values):
+    values = asarray(values)
+    block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+    return block, (block.name, values.shape, values.dtype.str)
+
+# Представление массива из разделяемой памяти без копирования
+def attach_array(description):
+    name, shape, dtype = description
+    block = shared_memory.SharedMemory(name=name)
+    return block, ndarray(shape, dtype=dtype, buffer=block.buf)
+
+# Сетка по описаниям разделяемых массивов; подключение выполняется один раз на процесс
+def get_shared_mesh(nodes_description, elems_description):
+    key = (nodes_description[0], elems_description[0])
+    if key not in _attached_meshes:
+        nodes_block, nodes = attach_array(nodes_description)
+        elems_block, elems = attach_array(elems_description)
+        _attached_meshes[key] = (nodes_block, elems_block, nodes, elems)
+    return _attached_meshes[key][2:]
+
+# Расчёт одной конфигурации: сборка, решение, напряжения. Возвращает строку сводной таблицы
+def run_case(case):
+    material, t, f_value, f_angle, step, nodes_description, elems_description = case
+    nodes, elems = get_shared_mesh(nodes_description, elems_description)
+    start = perf_counter()
+
+    solver = Solver(material["young"], material["poisson"], t, step, nodes, elems)
+    displacements, _ = solver.solve(f_value, f_angle, solver='direct')
+    _, _, stresses_eq, strains_eq = calc_stresses_and_strains(solver.elems, solver.E, solver.Bs, displacements)
+
+    return [material["name"], material["young"], material["poisson"], t, f_value, f_angle, step, len(nodes), len(elems),
+            linalg.norm(displacements, axis=1).max(), stresses_eq.max(), strains_eq.max(), perf_counter() - start]
+
+# Перебор сетки параметров на всех ядрах: сетки строятся один раз на шаг и передаются исполнителям
+# через разделяемую память, результаты собираются в одну таблицу output_path (TSV)
+def run_sweep(materials, thicknesses, forces, angles, steps, output_path, workers=None):
+    blocks, meshes = [], {}
+    try:
+        for step in steps:
+            nodes, elems = get_mesh(h, a, figure_edges, circles, circle_centers, step)
+            nodes_block, nodes_description = share_array(nodes)
+            elems_block, elems_description = share_array(elems)
+            blocks += [nodes_block, elems_block]
+            meshes[step] = (nodes_description, elems_description)
+
+        # Шаг сетки - внешний цикл, материал - следующий: соседние задачи используют одни кэши исполнителя
+        cases = [(material, t, f_value, f_angle, step, *meshes[step])
+                 for step, material, t, f_value, f_angle in product(steps, materials, thicknesses, forces, angles)]
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor, open(output_path, 'w', encoding='utf-8') as output:
+            output.write('\t'.join(SUMMARY_COLUMNS) + '\n')
+            for row in executor.map(run_case, cases, chunksize=max(1, len(cases) // (4 * (workers or os.cpu_count())))):
+                output.write('\t'.join(str(value) for value in row) + '\n')
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return len(cases)
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Перебор параметров расчёта заклёпочного соединения')
+    parser.add_argument('--materials', default='materials.json', help='файл материалов')
+    parser.add_argument('--thickness', type=float, nargs='+', default=[1.0], help='толщины')
+    parser.add_argument('--force', type=float, nargs='+', default=[1e10], help='величины силы')
+    parser.add_argument('--angle', type=float, nargs='+', default=[45.0], help='углы приложения силы (°)')
+    parser.add_argument('--step', type=float, nargs='+', default=[0.25, 0.5, 1], help='шаги сетки')
+    parser.add_argument('--workers', type=int, default=None, help='число процессов')
+    parser.add_argument('--output', default='sweep.tsv', help='файл сводной таблицы')
+    args = parser.parse_args()
+
+    with open(args.materials, 'rb') as f: materials = list(rapidjson.load(f).values())
+    count = run_sweep(materials, args.thickness, args.force, args.angle, args.step, args.output, args.workers)
+    print(f'Рассчитано конфигураций: {count}, результаты: {args.output}')
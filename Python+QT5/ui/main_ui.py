@@ -19,7 +19,7 @@ class Ui_MainWindow(object):
 "#centralwidget{\n"
 "    background-color: qlineargradient(spread:pad, x1:1, y1:1, x2:0, y2:0, stop:0 rgba(81, 0, 135, 255), stop:0.427447 rgba(41, 61, 132, 235), stop:1 rgba(155, 79, 165, 255));\n"
 "}\n"
-"#inputFrame,#buttonFrame{\n"
+"#inputFrame,#buttonFrame,#scrubFrame{\n"
 "    border:2px outset rgb(0, 191, 255);\n"
 "    border-radius:10px;\n"
 "    background-color: rgba(0, 0, 0, 0.6);\n"
@@ -78,7 +78,7 @@ class Ui_MainWindow(object):
 "    qproperty-alignment: AlignCenter;\n"
 "}\n"
 "QLineEdit:focus{border:2px solid #c6e2ff;}\n"
-"#step_box{\n"
+"#step_box,#angle_box,#force_box{\n"
 "    min-width:50px;\n"
 "    max-width:100px;\n"
 "    border-radius: 10px;\n"
@@ -99,7 +99,7 @@ class Ui_MainWindow(object):
 "QPushButton:pressed {\n"
 " background-color: qlineargradient(spread:reflect, x1:0, y1:0, x2:1, y2:0.994, stop:0 rgba(255, 0, 223, 44), stop:1 rgba(0, 0, 255, 49));\n"
 "}\n"
-"#ansysCheck{\n"
+"#ansysCheck,#smoothCheck,#nativeCheck{\n"
 "    min-height:35px;\n"
 "    padding:2px;\n"
 "    spacing:10px;\n"
@@ -107,7 +107,7 @@ class Ui_MainWindow(object):
 "    background-color: rgba(0, 0, 0, 0.3);\n"
 "    font: 12pt \"MS Shell Dlg 2\";\n"
 "}\n"
-"#ansysCheck::indicator{height:25px;width:25px;}\n"
+"#ansysCheck::indicator,#smoothCheck::indicator,#nativeCheck::indicator{height:25px;width:25px;}\n"
 "QMessageBox{\n"
 "    border:2px solid rgb(0, 191, 255);\n"
 "    background-color: qlineargradient(spread:pad, x1:1, y1:1, x2:0, y2:0, stop:0 rgba(81, 0, 135, 255), stop:0.427447 rgba(41, 61, 132, 235), stop:1 rgba(155, 79, 165, 255));\n"
@@ -261,7 +261,96 @@ class Ui_MainWindow(object):
         self.ansysCheck.setTristate(False)
         self.ansysCheck.setObjectName("ansysCheck")
         self.horizontalLayout.addWidget(self.ansysCheck)
+        self.smoothCheck = QtWidgets.QCheckBox(self.buttonFrame)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.smoothCheck.sizePolicy().hasHeightForWidth())
+        self.smoothCheck.setSizePolicy(sizePolicy)
+        self.smoothCheck.setMinimumSize(QtCore.QSize(0, 39))
+        self.smoothCheck.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+        self.smoothCheck.setObjectName("smoothCheck")
+        self.horizontalLayout.addWidget(self.smoothCheck)
+        self.nativeCheck = QtWidgets.QCheckBox(self.buttonFrame)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.nativeCheck.sizePolicy().hasHeightForWidth())
+        self.nativeCheck.setSizePolicy(sizePolicy)
+        self.nativeCheck.setMinimumSize(QtCore.QSize(0, 39))
+        self.nativeCheck.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+        self.nativeCheck.setObjectName("nativeCheck")
+        self.horizontalLayout.addWidget(self.nativeCheck)
+        self.solverSelect = QtWidgets.QComboBox(self.buttonFrame)
+        sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        sizePolicy.setHorizontalStretch(0)
+        sizePolicy.setVerticalStretch(0)
+        sizePolicy.setHeightForWidth(self.solverSelect.sizePolicy().hasHeightForWidth())
+        self.solverSelect.setSizePolicy(sizePolicy)
+        self.solverSelect.setMinimumSize(QtCore.QSize(0, 43))
+        self.solverSelect.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
+        self.solverSelect.setObjectName("solverSelect")
+        self.solverSelect.addItem("")
+        self.solverSelect.addItem("")
+        self.solverSelect.addItem("")
+        self.solverSelect.addItem("")
+        self.horizontalLayout.addWidget(self.solverSelect)
+        self.label6 = QtWidgets.QLabel(self.buttonFrame)
+        self.label6.setMinimumSize(QtCore.QSize(0, 42))
+        self.label6.setObjectName("label6")
+        self.horizontalLayout.addWidget(self.label6)
+        self.tolInput = QtWidgets.QLineEdit(self.buttonFrame)
+        self.tolInput.setMinimumSize(QtCore.QSize(0, 44))
+        self.tolInput.setMaximumSize(QtCore.QSize(90, 16777215))
+        self.tolInput.setObjectName("tolInput")
+        self.horizontalLayout.addWidget(self.tolInput)
+        self.label7 = QtWidgets.QLabel(self.buttonFrame)
+        self.label7.setMinimumSize(QtCore.QSize(0, 42))
+        self.label7.setObjectName("label7")
+        self.horizontalLayout.addWidget(self.label7)
+        self.maxiterInput = QtWidgets.QLineEdit(self.buttonFrame)
+        self.maxiterInput.setMinimumSize(QtCore.QSize(0, 44))
+        self.maxiterInput.setMaximumSize(QtCore.QSize(90, 16777215))
+        self.maxiterInput.setObjectName("maxiterInput")
+        self.horizontalLayout.addWidget(self.maxiterInput)
         self.verticalLayout_5.addWidget(self.buttonFrame)
+        self.scrubFrame = QtWidgets.QFrame(self.centralwidget)
+        self.scrubFrame.setFrameShape(QtWidgets.QFrame.StyledPanel)
+        self.scrubFrame.setFrameShadow(QtWidgets.QFrame.Raised)
+        self.scrubFrame.setObjectName("scrubFrame")
+        self.horizontalLayout_3 = QtWidgets.QHBoxLayout(self.scrubFrame)
+        self.horizontalLayout_3.setObjectName("horizontalLayout_3")
+        self.label8 = QtWidgets.QLabel(self.scrubFrame)
+        self.label8.setMinimumSize(QtCore.QSize(0, 42))
+        self.label8.setObjectName("label8")
+        self.horizontalLayout_3.addWidget(self.label8)
+        self.angleSlider = QtWidgets.QSlider(self.scrubFrame)
+        self.angleSlider.setMinimumSize(QtCore.QSize(150, 0))
+        self.angleSlider.setOrientation(QtCore.Qt.Horizontal)
+        self.angleSlider.setObjectName("angleSlider")
+        self.horizontalLayout_3.addWidget(self.angleSlider)
+        self.angle_box = QtWidgets.QLabel(self.scrubFrame)
+        self.angle_box.setMinimumSize(QtCore.QSize(54, 42))
+        self.angle_box.setMaximumSize(QtCore.QSize(104, 16777215))
+        self.angle_box.setText("")
+        self.angle_box.setObjectName("angle_box")
+        self.horizontalLayout_3.addWidget(self.angle_box)
+        self.label9 = QtWidgets.QLabel(self.scrubFrame)
+        self.label9.setMinimumSize(QtCore.QSize(0, 42))
+        self.label9.setObjectName("label9")
+        self.horizontalLayout_3.addWidget(self.label9)
+        self.forceSlider = QtWidgets.QSlider(self.scrubFrame)
+        self.forceSlider.setMinimumSize(QtCore.QSize(150, 0))
+        self.forceSlider.setOrientation(QtCore.Qt.Horizontal)
+        self.forceSlider.setObjectName("forceSlider")
+        self.horizontalLayout_3.addWidget(self.forceSlider)
+        self.force_box = QtWidgets.QLabel(self.scrubFrame)
+        self.force_box.setMinimumSize(QtCore.QSize(54, 42))
+        self.force_box.setMaximumSize(QtCore.QSize(104, 16777215))
+        self.force_box.setText("")
+        self.force_box.setObjectName("force_box")
+        self.horizontalLayout_3.addWidget(self.force_box)
+        self.verticalLayout_5.addWidget(self.scrubFrame)
         self.tabWidget = QtWidgets.QTabWidget(self.centralwidget)
         self.tabWidget.setStyleSheet("")
         self.tabWidget.setObjectName("tabWidget")
@@ -302,6 +391,16 @@ class Ui_MainWindow(object):
         self.execButton.setText(_translate("MainWindow", "Построить графики"))
         self.ansysButton.setText(_translate("MainWindow", "Загрузить сетку из Ansys"))
         self.ansysCheck.setText(_translate("MainWindow", "Использовать сетку из Ansys"))
+        self.smoothCheck.setText(_translate("MainWindow", "Сглаживание по узлам"))
+        self.nativeCheck.setText(_translate("MainWindow", "Быстрый вывод (Qt)"))
+        self.solverSelect.setItemText(0, _translate("MainWindow", "Решатель: сопряжённые градиенты"))
+        self.solverSelect.setItemText(1, _translate("MainWindow", "Решатель: прямой (разложение)"))
+        self.solverSelect.setItemText(2, _translate("MainWindow", "Решатель: ПСГ (Якоби)"))
+        self.solverSelect.setItemText(3, _translate("MainWindow", "Решатель: ПСГ (неполное LU)"))
+        self.label6.setText(_translate("MainWindow", "Точность:"))
+        self.label7.setText(_translate("MainWindow", "Итераций:"))
+        self.label8.setText(_translate("MainWindow", "Угол силы:"))
+        self.label9.setText(_translate("MainWindow", "Величина силы:"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.MplWidget1), _translate("MainWindow", "Модель"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.MplWidget2), _translate("MainWindow", "Напряжения и деформации"))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.MplWidget3), _translate("MainWindow", "Эквивалентное напряжение и деформация"))
@@ -0,0 +1,47 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+class Cancelled(Exception):
+    pass
+
+# Поток для расчёта вне потока интерфейса: сообщает о ходе расчёта по этапам и может быть
+# отменён между этапами (requestInterruption). Построение графиков остаётся в потоке интерфейса
+class AnalysisWorker(QThread):
+    progress = pyqtSignal(int, str) # Процент выполнения и название этапа
+    resultReady = pyqtSignal(object, object, object) # Solver, результаты Solver.results, сведения о решении
+    failed = pyqtSignal(str)
+
+    def __init__(self, params, parent=None):
+        super().__init__(parent)
+        self.params = params
+
+    # Проверка отмены и сообщение о переходе к следующему этапу
+    def checkpoint(self, percent, stage):
+        if self.isInterruptionRequested(): raise Cancelled()
+        self.progress.emit(percent, stage)
+
+    def run(self):
+        p = self.params
+        try:
+            # scipy и расчётные модули загружаются при первом расчёте в этом потоке, а не при запуске приложения
+            from cache import get_mesh
+            from solver import Solver
+            from geometry import h, a, figure_edges, circles, circle_centers
+            self.checkpoint(0, 'Построение сетки')
+            nodes, elems = (p['nodes'], p['elems']) if p['nodes'] is not None else get_mesh(h, a, figure_edges, circles, circle_centers, p['step'])
+            self.checkpoint(25, 'Сборка системы')
+            solver = Solver(p['young'], p['poisson'], p['thickness'], p['step'], nodes, elems)
+            self.checkpoint(50, 'Решение системы')
+            last_solution = p['last_solution']
+            x0 = last_solution[1] if last_solution and last_solution[0] == solver.mesh_key else None # Тёплый старт
+            displacements, solve_info = solver.solve(p['force'], p['angle'], x0=x0, **p['solver_options'])
+            self.checkpoint(75, 'Напряжения и деформации')
+            results = solver.results(displacements, p['force'], p['angle'], p['nodal'])
+            self.checkpoint(100, 'Построение графиков')
+            self.resultReady.emit(solver, results, solve_info)
+            # Единичные отклики - после вывода результатов, тем же методом решения, что и основной расчёт
+            if self.isInterruptionRequested(): raise Cancelled()
+            solver.prepare_superposition(**p['solver_options'])
+        except Cancelled:
+            pass
+        except Exception as e:
+            self.failed.emit(str(e))